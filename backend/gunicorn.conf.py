@@ -0,0 +1,25 @@
+# Multi-worker deployment: gunicorn -c gunicorn.conf.py server:app (from backend/)
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8001")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers read this to switch on cross-worker cache sync (CLUSTER_SYNC) and the shared rate-limit store
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# No preload_app: the Motor client and background tasks must be created inside
+# each worker's event loop, which the startup hook does after the fork
+preload_app = False
+
+# SSE streams stay open; give them time to drain on a graceful restart
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+
+# Recycle workers now and then so slow leaks cannot build up; jitter avoids restarting them all at once
+max_requests = 50000
+max_requests_jitter = 5000
+
+accesslog = "-"
@@ -1,17 +1,61 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring, CursorType, DeleteOne, IndexModel, InsertOne, ReplaceOne, ReturnDocument, UpdateOne, ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from pydantic import BaseModel, ValidationError
 from typing import Optional, List
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
 import os
+import time
 import uuid
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+import base64
+import bisect
+import csv
+import functools
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import logging
+import math
+import re
+import threading
+import unicodedata
 import bcrypt
+import httpx
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:  # snapshots then ship gzip only
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails then fall back to the validated original
+    Image = None
+
+logger = logging.getLogger("center_french")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup_event()
+    yield
+    await shutdown_event()
 
 # Initialize FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -22,10 +66,246 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB connection
+# Prometheus text-format metrics, kept in-process so no client library or
+# collector is needed. Observations are a lock plus a few list updates, cheap
+# enough to leave on; /metrics renders them on demand.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class MetricCounter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            for label_values, value in self.values.items():
+                lines.append(f"{self.name}{format_labels(self.labels, label_values)} {value}")
+        return lines
+
+class MetricGauge(MetricCounter):
+    kind = "gauge"
+
+    def dec(self, *label_values):
+        self.inc(*label_values, amount=-1)
+
+class MetricHistogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple, labels: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.labels = labels
+        self.series = {}  # label values -> [count per bucket..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, series in self.series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series):
+                    cumulative += count
+                    bucket_label = 'le="' + str(bound) + '"'
+                    lines.append(f"{self.name}_bucket{format_labels(self.labels, label_values, bucket_label)} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.labels, label_values)} {series[-1]}")
+                lines.append(f"{self.name}_count{format_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+http_requests_total = MetricCounter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+http_request_duration = MetricHistogram("http_request_duration_seconds", "HTTP request latency", LATENCY_BUCKETS, ("method", "route"))
+http_response_size = MetricHistogram("http_response_size_bytes", "HTTP response body size", SIZE_BUCKETS, ("method", "route"))
+http_in_flight = MetricGauge("http_requests_in_flight", "HTTP requests being processed")
+mongo_command_duration = MetricHistogram("mongo_command_duration_seconds", "MongoDB command latency", LATENCY_BUCKETS, ("command",))
+mongo_command_failures = MetricCounter("mongo_command_failures_total", "Failed MongoDB commands", ("command",))
+bcrypt_duration = MetricHistogram("bcrypt_duration_seconds", "bcrypt work on the password pool", LATENCY_BUCKETS, ("operation",))
+jwt_decode_duration = MetricHistogram("jwt_decode_duration_seconds", "JWT signature verification", LATENCY_BUCKETS)
+job_runs_total = MetricCounter("job_runs_total", "Background job runs by outcome", ("job", "outcome"))
+job_duration = MetricHistogram("job_duration_seconds", "Background job run time", LATENCY_BUCKETS, ("job",))
+METRICS = [http_requests_total, http_request_duration, http_response_size, http_in_flight,
+           mongo_command_duration, mongo_command_failures, bcrypt_duration, jwt_decode_duration,
+           job_runs_total, job_duration]
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        response = {"status": 500, "size": 0}
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_in_flight.dec()
+            # Label by route template, not raw path, so gear ids do not explode cardinality
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            http_requests_total.inc(method, route_path, response["status"])
+            http_request_duration.observe(time.perf_counter() - start, method, route_path)
+            http_response_size.observe(response["size"], method, route_path)
+
+app.add_middleware(MetricsMiddleware)
+
+class MongoMetricsListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name)
+        mongo_command_failures.inc(event.command_name)
+
+# MongoDB connection (Motor: non-blocking, every call must be awaited)
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
-client = MongoClient(MONGO_URL)
-db = client.center_french
+MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'center_french')
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))
+MONGO_TIMEOUT_MS = int(os.environ.get('MONGO_TIMEOUT_MS', '5000'))
+# Multi-document transactions need a replica set; without them approval is still
+# race-free thanks to the status guard, with a compensating write on failure
+MONGO_TRANSACTIONS = os.environ.get('MONGO_TRANSACTIONS', 'false').lower() == 'true'
+# Several worker processes (gunicorn.conf.py sets WEB_CONCURRENCY) keep their
+# in-process caches coherent through the database; see ClusterSync below
+WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', '1'))
+CLUSTER_SYNC = os.environ.get('CLUSTER_SYNC', 'true' if WEB_CONCURRENCY > 1 else 'false').lower() == 'true'
+
+# Created by the startup hook, so each worker process gets its own pool on its own event loop
+client = None
+db = None
+
+def connect_mongo():
+    global client, db
+    if client is None:
+        client = AsyncIOMotorClient(
+            MONGO_URL,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_TIMEOUT_MS,
+            event_listeners=[MongoMetricsListener()],
+        )
+        db = client[MONGO_DB_NAME]
+
+# Every query filters on one of these fields, so each needs an index to avoid a collection scan
+MONGO_INDEXES = {
+    "gears": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("category", ASCENDING)], name="category"),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+    ],
+    "suggestions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created_at"),
+        # Lets the archival job find old decisions without scanning the queue
+        IndexModel([("status", ASCENDING), ("resolved_at", ASCENDING)], name="status_resolved_at"),
+        # Unfiltered exports stream in created_at order; without it mongod sorts the whole collection first
+        IndexModel([("created_at", ASCENDING)], name="created_at"),
+        # At most one pending suggestion per Roblox gear; repeats bump its submission_count
+        IndexModel([("gear_id", ASCENDING)], name="gear_id_pending_unique", unique=True,
+                   partialFilterExpression={"status": "pending"}),
+    ],
+    "revoked_tokens": [
+        IndexModel([("digest", ASCENDING)], name="digest_unique", unique=True),
+        # Mongo drops each entry once the token it revokes has expired anyway
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Representative hot-path queries checked with explain() at startup
+INDEX_CHECK_QUERIES = [
+    ("gears", {"id": ""}),
+    ("gears", {"category": "joueurs"}),
+    ("users", {"username": ""}),
+    ("suggestions", {"id": ""}),
+    ("suggestions", {"status": "pending"}),
+]
+MONGO_INDEX_CHECK = os.environ.get('MONGO_INDEX_CHECK', 'true').lower() == 'true'
+
+async def ensure_indexes():
+    # create_indexes is a no-op for indexes that already exist with the same spec.
+    # One call per index, so a unique index blocked by duplicates cannot take the others down
+    for collection, indexes in MONGO_INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except PyMongoError as e:
+                # Usually duplicate values blocking a unique index; keep serving and report it
+                logger.error("Impossible de créer l'index %s.%s: %s", collection, index.document["name"], e)
+
+def plan_stages(plan: dict) -> set:
+    stages = {plan.get("stage")}
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages |= plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages |= plan_stages(child)
+    return stages
+
+async def check_indexes() -> dict:
+    report = {"missing": [], "collection_scans": []}
+    for collection, indexes in MONGO_INDEXES.items():
+        existing = await db[collection].index_information()
+        for index in indexes:
+            if index.document["name"] not in existing:
+                report["missing"].append(f"{collection}.{index.document['name']}")
+    for collection, query in INDEX_CHECK_QUERIES:
+        try:
+            explanation = await db[collection].find(query).explain()
+        except Exception as e:
+            # Diagnostic only: an unsupported explain() must never block startup
+            logger.warning("explain() indisponible pour %s: %s", collection, e)
+            continue
+        winning_plan = explanation.get("queryPlanner", {}).get("winningPlan", {})
+        if "COLLSCAN" in plan_stages(winning_plan):
+            report["collection_scans"].append(f"{collection} {sorted(query)}")
+    if report["missing"] or report["collection_scans"]:
+        logger.warning("Index manquants: %s, scans de collection: %s",
+                       report["missing"], report["collection_scans"])
+    return report
 
 # Security
 security = HTTPBearer()
@@ -67,6 +347,8 @@ class Suggestion(BaseModel):
     category: str
     status: str  # pending, approved, rejected
     created_at: datetime
+    submission_count: int = 1
+    resolved_at: Optional[datetime] = None
 
 class SuggestionCreate(BaseModel):
     name: str
@@ -89,137 +371,1795 @@ class UserLogin(BaseModel):
     username: str
     password: str
 
+class TokenRevoke(BaseModel):
+    username: str
+
+class GearBulkOperation(BaseModel):
+    action: str  # create, update, delete
+    id: Optional[str] = None
+    gear: Optional[dict] = None  # validated per item so one bad entry does not fail the batch
+
+class GearBulkRequest(BaseModel):
+    operations: List[GearBulkOperation]
+
+class SuggestionBulkRequest(BaseModel):
+    ids: List[str]
+
+# Password hashing runs on a bounded thread pool (bcrypt releases the GIL)
+# so logins never stall the event loop
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', '4'))
+PASSWORD_MAX_PENDING = int(os.environ.get('PASSWORD_MAX_PENDING', '64'))
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt")
+password_jobs_pending = 0
+
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(BCRYPT_ROUNDS)).decode('utf-8')
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def timed_password_job(func, *args):
+    start = time.perf_counter()
+    try:
+        return func(*args)
+    finally:
+        bcrypt_duration.observe(time.perf_counter() - start, func.__name__)
+
+async def run_password_job(func, *args):
+    global password_jobs_pending
+    # Shed load instead of queueing without bound when a login burst arrives
+    if password_jobs_pending >= PASSWORD_MAX_PENDING:
+        raise HTTPException(
+            status_code=503,
+            detail="Serveur surchargé, réessayez plus tard",
+            headers={"Retry-After": "1"},
+        )
+    password_jobs_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, timed_password_job, func, *args)
+    finally:
+        password_jobs_pending -= 1
+
 def create_access_token(username: str, role: str) -> str:
+    issued_ms = int(time.time() * 1000)
+    now = datetime.utcfromtimestamp(issued_ms / 1000)
     payload = {
         "username": username,
         "role": role,
-        "exp": datetime.utcnow() + timedelta(hours=24)
+        "iat": now,
+        # iat has whole seconds only; forced revocation compares this instead
+        "iat_ms": issued_ms,
+        "exp": now + timedelta(hours=24)
     }
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=["HS256"])
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def pop(self, key):
+        return self.entries.pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.entries),
+            "max_size": self.maxsize,
+        }
+
+# Verified tokens are cached by digest so polling clients skip the HS256 check.
+# Revocation is checked on every request, hit or miss, with O(1) lookups:
+# revoked_tokens holds single tokens (logout), tokens_revoked_before holds a
+# per-user cutoff compared with the token's iat_ms (forced revocation).
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', '1024'))
+TOKEN_REVOCATION_PERSIST = os.environ.get('TOKEN_REVOCATION_PERSIST', 'true').lower() == 'true'
+token_cache = LRUCache(TOKEN_CACHE_SIZE)
+revoked_tokens = {}  # token digest -> exp timestamp
+tokens_revoked_before = {}  # username -> millisecond timestamp, like the iat_ms it is compared with
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def verify_token(token: str) -> tuple:
+    """Return (user, exp, issued_ms) for a valid token, decoding it only on a cache miss."""
+    digest = token_digest(token)
+    if not lifecycle.revocations_loaded:
+        # Until the revocation list is in memory a logged-out token would still pass
+        raise HTTPException(status_code=503, detail="Serveur en cours de démarrage")
+    if digest in revoked_tokens:
+        raise HTTPException(status_code=401, detail="Token révoqué")
+    entry = token_cache.get(digest)
+    if entry is None:
+        try:
+            start = time.perf_counter()
+            try:
+                payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+            finally:
+                jwt_decode_duration.observe(time.perf_counter() - start)
+        except jwt.ExpiredSignatureError:
+            raise HTTPException(status_code=401, detail="Token expiré")
+        except jwt.InvalidTokenError:
+            raise HTTPException(status_code=401, detail="Token invalide")
         username = payload.get("username")
         role = payload.get("role")
         if username is None or role is None:
             raise HTTPException(status_code=401, detail="Token invalide")
-        return User(username=username, role=role)
-    except jwt.ExpiredSignatureError:
+        # Tokens minted before iat_ms existed fall back to the start of their iat second
+        issued_ms = payload.get("iat_ms", payload.get("iat", 0) * 1000)
+        entry = (User(username=username, role=role), payload["exp"], issued_ms)
+        token_cache.put(digest, entry)
+
+    user, exp, issued_ms = entry
+    if exp <= time.time():
+        token_cache.pop(digest)
         raise HTTPException(status_code=401, detail="Token expiré")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Token invalide")
+    cutoff = tokens_revoked_before.get(user.username)
+    # Strict: a token issued in the revocation's own millisecond (a fresh login) stays valid
+    if cutoff is not None and issued_ms < cutoff:
+        raise HTTPException(status_code=401, detail="Token révoqué")
+    return entry
 
-# Initialize database with sample data
-@app.on_event("startup")
-async def startup_event():
-    # Create admin user if doesn't exist
-    if not db.users.find_one({"username": "admin"}):
-        admin_user = {
-            "username": "admin",
-            "password": hash_password("Mouse123890!"),
-            "role": "createur"
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    user, _, _ = verify_token(credentials.credentials)
+    return user
+
+async def revoke_token(token: str, exp: float):
+    now = time.time()
+    for digest in [digest for digest, expires in revoked_tokens.items() if expires <= now]:
+        del revoked_tokens[digest]
+    digest = token_digest(token)
+    revoked_tokens[digest] = exp
+    token_cache.pop(digest)
+    if TOKEN_REVOCATION_PERSIST:
+        await db.revoked_tokens.update_one(
+            {"digest": digest},
+            {"$set": {"digest": digest, "expires_at": datetime.utcfromtimestamp(exp)}},
+            upsert=True,
+        )
+        cluster_sync.notify("revocations")
+
+async def revoke_user_tokens(username: str):
+    cutoff = int(time.time() * 1000)
+    tokens_revoked_before[username] = cutoff
+    if TOKEN_REVOCATION_PERSIST:
+        await db.users.update_one(
+            {"username": username},
+            {"$set": {"tokens_revoked_before_ms": cutoff}, "$unset": {"tokens_revoked_before": ""}}
+        )
+        cluster_sync.notify("revocations")
+
+async def load_revocations():
+    async for revoked in db.revoked_tokens.find({"expires_at": {"$gt": datetime.utcnow()}}, {"_id": 0}):
+        revoked_tokens[revoked["digest"]] = revoked["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+    async for user in db.users.find(
+        {"$or": [{"tokens_revoked_before_ms": {"$exists": True}}, {"tokens_revoked_before": {"$exists": True}}]},
+        {"_id": 0, "username": 1, "tokens_revoked_before_ms": 1, "tokens_revoked_before": 1}
+    ):
+        if "tokens_revoked_before_ms" in user:
+            tokens_revoked_before[user["username"]] = int(user["tokens_revoked_before_ms"])
+        else:
+            # Whole-second cutoff written before iat_ms existed
+            tokens_revoked_before[user["username"]] = int(user["tokens_revoked_before"]) * 1000
+
+# Rate limiting for the public write and login endpoints. Budgets are
+# "<requests>/<seconds>" token buckets keyed by client IP (and by username for
+# login). The default store is in-process; RATE_LIMIT_BACKEND=mongo shares
+# fixed-window counters between workers through the rate_limits collection.
+def parse_rate(spec: str) -> tuple:
+    count, seconds = spec.split("/")
+    return int(count), float(seconds)
+
+LOGIN_IP_RATE = parse_rate(os.environ.get('RATE_LIMIT_LOGIN_IP', '20/60'))
+LOGIN_USERNAME_RATE = parse_rate(os.environ.get('RATE_LIMIT_LOGIN_USERNAME', '5/60'))
+SUGGESTION_IP_RATE = parse_rate(os.environ.get('RATE_LIMIT_SUGGESTIONS_IP', '10/60'))
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'mongo' if CLUSTER_SYNC else 'memory')
+RATE_LIMIT_MAX_KEYS = int(os.environ.get('RATE_LIMIT_MAX_KEYS', '100000'))
+# Only trust X-Forwarded-For when a proxy we control always sets it
+RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true'
+
+class MemoryRateLimitStore:
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()  # key -> [tokens, updated_at, seconds to refill fully], oldest first
+
+    async def take(self, key: str, rate: tuple) -> float:
+        """Consume one token; return 0 if allowed, else seconds until one is available."""
+        capacity, seconds = rate
+        now = time.monotonic()
+        self.evict_idle(now)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(capacity), now, seconds]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * capacity / seconds)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) * seconds / capacity
+
+    def evict_idle(self, now: float):
+        # A bucket idle long enough to be full again is the same as no bucket
+        while self.buckets:
+            key, (_, updated_at, refill_seconds) = next(iter(self.buckets.items()))
+            if now - updated_at < refill_seconds and len(self.buckets) < self.max_keys:
+                break
+            del self.buckets[key]
+
+class MongoRateLimitStore:
+    async def take(self, key: str, rate: tuple) -> float:
+        capacity, seconds = rate
+        now = time.time()
+        window_start = now - now % seconds
+        counter = await db.rate_limits.find_one_and_update(
+            {"_id": f"{key}:{int(window_start)}"},
+            {"$inc": {"count": 1},
+             "$setOnInsert": {"expires_at": datetime.utcfromtimestamp(window_start + seconds)}},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        if counter["count"] <= capacity:
+            return 0.0
+        return window_start + seconds - now
+
+if RATE_LIMIT_BACKEND == "mongo":
+    rate_limit_store = MongoRateLimitStore()
+    MONGO_INDEXES["rate_limits"] = [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ]
+else:
+    rate_limit_store = MemoryRateLimitStore(RATE_LIMIT_MAX_KEYS)
+
+def client_ip(request: Request) -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for:
+            # The last hop is the one appended by our own proxy
+            return forwarded_for.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+async def enforce_rate_limit(key: str, rate: tuple):
+    retry_after = await rate_limit_store.take(key, rate)
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="Trop de requêtes, réessayez plus tard",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+class RateLimit:
+    """Route dependency enforcing a per-client-IP budget."""
+    def __init__(self, name: str, rate: tuple):
+        self.name = name
+        self.rate = rate
+
+    async def __call__(self, request: Request):
+        await enforce_rate_limit(f"{self.name}:ip:{client_ip(request)}", self.rate)
+
+# Gear search: an in-process inverted index over name, nickname, gear_id and
+# description. Text is accent- and case-folded ("Épée" matches "epee"), every
+# query token also matches as a prefix, and tokens of SEARCH_FUZZY_MIN_LENGTH
+# characters or more tolerate one typo through a deletion-neighbourhood index.
+# Postings are bucketed by field weight so the best-scoring matches are read
+# first; the most selective query token contributes at most
+# SEARCH_MAX_CANDIDATES gears, best first, counting only gears that also match
+# every other token, which then add to their score.
+SEARCH_FIELD_WEIGHTS = {"name": 3, "nickname": 3, "gear_id": 3, "description": 1}
+SEARCH_EXACT, SEARCH_PREFIX, SEARCH_FUZZY = 3, 2, 1
+SEARCH_PREFIX_EXPANSION = int(os.environ.get('SEARCH_PREFIX_EXPANSION', '100'))
+SEARCH_MAX_CANDIDATES = int(os.environ.get('SEARCH_MAX_CANDIDATES', '1000'))
+SEARCH_FUZZY_MIN_LENGTH = int(os.environ.get('SEARCH_FUZZY_MIN_LENGTH', '4'))
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+@functools.lru_cache(maxsize=65536)
+def normalize_word(word: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", word)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+def normalize_text(text: str) -> str:
+    if text.isascii():
+        return text.lower()
+    # Catalog text reuses a small vocabulary, so folding word by word through a cache
+    # keeps a full index rebuild from decomposing every character of every gear
+    return " ".join(normalize_word(word) for word in text.split())
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall(normalize_text(text))
+
+def deletions(token: str) -> set:
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+def within_one_edit(a: str, b: str) -> bool:
+    # Optimal string alignment distance <= 1: one insertion, deletion, substitution or adjacent swap
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) < len(b):
+        return any(b[:i] + b[i + 1:] == a for i in range(len(b)))
+    diffs = [i for i in range(len(a)) if a[i] != b[i]]
+    if len(diffs) <= 1:
+        return True
+    return len(diffs) == 2 and diffs[1] == diffs[0] + 1 and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]]
+
+class GearSearchIndex:
+    def __init__(self):
+        self.postings = {}  # token -> {field weight: sorted gear ids}
+        self.doc_tokens = {}  # gear id -> {token: field weight}, to unindex and to score candidates
+        self.vocabulary = []  # sorted tokens for prefix lookups
+        self.deletes = {}  # token minus one character -> tokens, for typo tolerance
+        self.building = False
+
+    def rebuild(self, gears: list):
+        # Bulk load sorts the vocabulary once instead of inserting token by token
+        self.__init__()
+        self.building = True
+        for gear in gears:
+            self.add(gear)
+        self.vocabulary = sorted(self.postings)
+        for buckets in self.postings.values():
+            for bucket in buckets.values():
+                bucket.sort()
+        self.building = False
+
+    def add(self, gear: dict):
+        self.remove(gear["id"])
+        weights = {}
+        for field, weight in SEARCH_FIELD_WEIGHTS.items():
+            for token in tokenize(str(gear.get(field, ""))):
+                weights[token] = max(weights.get(token, 0), weight)
+        for token, weight in weights.items():
+            buckets = self.postings.get(token)
+            if buckets is None:
+                buckets = self.postings[token] = {}
+                self.add_token(token)
+            bucket = buckets.get(weight)
+            if bucket is None:
+                bucket = buckets[weight] = []
+            if self.building:
+                bucket.append(gear["id"])
+            else:
+                bisect.insort(bucket, gear["id"])
+        self.doc_tokens[gear["id"]] = weights
+
+    def remove(self, gear_id: str):
+        weights = self.doc_tokens.pop(gear_id, None)
+        if weights is None:
+            return
+        for token, weight in weights.items():
+            buckets = self.postings[token]
+            bucket = buckets[weight]
+            index = bisect.bisect_left(bucket, gear_id)
+            if index < len(bucket) and bucket[index] == gear_id:
+                del bucket[index]
+            if not bucket:
+                del buckets[weight]
+                if not buckets:
+                    del self.postings[token]
+                    self.drop_token(token)
+
+    def add_token(self, token: str):
+        if not self.building:
+            bisect.insort(self.vocabulary, token)
+        for variant in deletions(token):
+            self.deletes.setdefault(variant, set()).add(token)
+
+    def drop_token(self, token: str):
+        del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+        for variant in deletions(token):
+            words = self.deletes.get(variant)
+            if words is not None:
+                words.discard(token)
+                if not words:
+                    del self.deletes[variant]
+
+    def expand(self, token: str) -> dict:
+        """Map a query token to the indexed tokens it matches and their match weight."""
+        matches = {}
+        start = bisect.bisect_left(self.vocabulary, token)
+        for word in self.vocabulary[start:start + SEARCH_PREFIX_EXPANSION]:
+            if not word.startswith(token):
+                break
+            matches[word] = SEARCH_EXACT if word == token else SEARCH_PREFIX
+        if len(token) >= SEARCH_FUZZY_MIN_LENGTH:
+            candidates = set(self.deletes.get(token, ()))
+            for variant in deletions(token):
+                if variant in self.postings:
+                    candidates.add(variant)
+                candidates |= self.deletes.get(variant, set())
+            for word in candidates:
+                if word not in matches and within_one_edit(token, word):
+                    matches[word] = SEARCH_FUZZY
+        return matches
+
+    def candidates(self, matches: dict, limit: int, accept) -> dict:
+        """Best-scoring gears for one query token, at most `limit` of them: {gear id: score}."""
+        levels = {}
+        for word, match_weight in matches.items():
+            for field_weight, bucket in self.postings[word].items():
+                levels.setdefault(match_weight * field_weight, []).append(bucket)
+        scores = {}
+        for score in sorted(levels, reverse=True):
+            # Highest ids first, as the final ranking breaks ties by id; a level far
+            # larger than the room left is only read as far as needed
+            for gear_id in heapq.merge(*(reversed(bucket) for bucket in levels[score]), reverse=True):
+                if gear_id not in scores and (accept is None or accept(gear_id)):
+                    scores[gear_id] = score
+                    if len(scores) >= limit:
+                        return scores
+        return scores
+
+    def search(self, query: str, limit: int, accept=None) -> list:
+        """Ids of the best `limit` gears matching every token of the query (and `accept`, if given)."""
+        expansions = [self.expand(token) for token in tokenize(query)]
+        if not expansions or not all(expansions):
+            return []
+        # The token with the fewest postings drives; the others only score its candidates
+        expansions.sort(key=lambda matches: sum(
+            len(bucket) for word in matches for bucket in self.postings[word].values()))
+        driver, others = expansions[0], expansions[1:]
+
+        def matches_all(gear_id):
+            # Checked before the candidate cap, so it only counts gears matching every token
+            tokens = self.doc_tokens[gear_id]
+            return (all(any(token in matches for token in tokens) for matches in others)
+                    and (accept is None or accept(gear_id)))
+
+        scores = self.candidates(driver, max(limit, SEARCH_MAX_CANDIDATES),
+                                 matches_all if others else accept)
+        for matches in others:
+            for gear_id in scores:
+                scores[gear_id] += max(matches.get(token, 0) * weight
+                                       for token, weight in self.doc_tokens[gear_id].items())
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [gear_id for gear_id, _ in best]
+
+# In-process gear catalog cache. Reads are served from memory; every gear
+# write patches it. Other workers' writes arrive through ClusterSync within
+# about a second; the TTL reload is a backstop for edits made outside the API.
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', '30'))
+
+class GearCatalogCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.by_id = {}
+        self.by_category = {}
+        self.loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.lock = asyncio.Lock()
+        # Encoded JSON bodies and sorted id lists keyed by category (None = full catalog),
+        # both dropped on every write
+        self.encoded_bodies = {}
+        self.sorted_id_lists = {}
+        self.last_modified = time.time()
+        self.search_index = GearSearchIndex()
+        self.gear_ids = Counter()  # Roblox gear_id -> number of catalog gears using it
+        # (gear id, gear or None) for every put/remove made while load() awaits the
+        # database; callers hold self.lock, so one log is enough
+        self.write_log = None
+
+    def is_fresh(self) -> bool:
+        return self.loaded_at is not None and time.monotonic() - self.loaded_at < self.ttl
+
+    async def load(self):
+        self.write_log = []
+        try:
+            gears = await db.gears.find({}, {"_id": 0}).to_list(None)
+            search_index = None
+            if self.loaded_at is None:
+                # Seconds for a large catalog: build a fresh index off the event loop, then swap it in
+                search_index = GearSearchIndex()
+                await asyncio.get_running_loop().run_in_executor(None, search_index.rebuild, gears)
+            by_id = {}
+            by_category = {}
+            for gear in gears:
+                by_id[gear["id"]] = gear
+                by_category.setdefault(gear["category"], {})[gear["id"]] = gear
+            # Writes that landed while we awaited may be missing from what we read;
+            # replaying them (idempotently) keeps the swap below from undoing them
+            for gear_id, gear in self.write_log:
+                stale = by_id.pop(gear_id, None)
+                if stale is not None:
+                    by_category.get(stale["category"], {}).pop(gear_id, None)
+                if gear is not None:
+                    by_id[gear_id] = gear
+                    by_category.setdefault(gear["category"], {})[gear_id] = gear
+                if search_index is not None:
+                    search_index.remove(gear_id)
+                    if gear is not None:
+                        search_index.add(gear)
+        finally:
+            self.write_log = None
+        if search_index is not None:
+            self.search_index = search_index
+        elif by_id != self.by_id:
+            # Compared by content: Mongo's natural order says nothing about the catalog
+            self.touch()
+            snapshot_builder.mark_dirty(*SNAPSHOT_CATEGORIES)
+            # Reindex only what changed since the last load
+            for gear_id in self.by_id.keys() - by_id.keys():
+                self.search_index.remove(gear_id)
+            for gear_id, gear in by_id.items():
+                if self.by_id.get(gear_id) != gear:
+                    self.search_index.add(gear)
+        self.by_id = by_id
+        self.by_category = by_category
+        self.gear_ids = Counter(gear["gear_id"] for gear in by_id.values())
+        self.loaded_at = time.monotonic()
+        self.reloads += 1
+
+    def touch(self):
+        self.encoded_bodies = {}
+        self.sorted_id_lists = {}
+        self.last_modified = time.time()
+
+    async def ensure_fresh(self):
+        if self.is_fresh():
+            self.hits += 1
+            return
+        self.misses += 1
+        async with self.lock:
+            # Another request may have reloaded while we waited for the lock
+            if not self.is_fresh():
+                await self.load()
+
+    async def list(self, category: Optional[str] = None) -> list:
+        """Gears ordered by id, so every worker encodes (and tags) the same catalog identically."""
+        await self.ensure_fresh()
+        return [self.by_id[gear_id] for gear_id in self.sorted_ids(category)]
+
+    async def get(self, gear_id: str) -> Optional[dict]:
+        await self.ensure_fresh()
+        return self.by_id.get(gear_id)
+
+    async def encoded(self, category: Optional[str] = None) -> tuple:
+        """Return (body, etag, last_modified) for the catalog or one category."""
+        gears = await self.list(category)
+        key = category or None
+        entry = self.encoded_bodies.get(key)
+        if entry is None:
+            # Same separators as FastAPI's JSONResponse so clients see identical bytes
+            body = json.dumps(gears, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            entry = (body, etag, formatdate(self.last_modified, usegmt=True))
+            # Unknown categories are not memoized so arbitrary query strings cannot grow memory
+            if key is None or key in self.by_category:
+                self.encoded_bodies[key] = entry
+        return entry
+
+    def sorted_ids(self, category: Optional[str] = None) -> list:
+        key = category or None
+        ids = self.sorted_id_lists.get(key)
+        if ids is None:
+            ids = sorted(self.by_category.get(category, {}) if category else self.by_id)
+            if key is None or key in self.by_category:
+                self.sorted_id_lists[key] = ids
+        return ids
+
+    async def page(self, category: Optional[str], after: Optional[str], limit: int) -> tuple:
+        """Return (gears, last_id or None when exhausted, total) for one keyset page ordered by id."""
+        await self.ensure_fresh()
+        ids = self.sorted_ids(category)
+        start = bisect.bisect_right(ids, after) if after else 0
+        page_ids = ids[start:start + limit]
+        last_id = page_ids[-1] if start + limit < len(ids) else None
+        return [self.by_id[gear_id] for gear_id in page_ids], last_id, len(ids)
+
+    async def search(self, query: str, category: Optional[str], limit: int) -> list:
+        await self.ensure_fresh()
+        accept = (lambda gear_id: self.by_id[gear_id]["category"] == category) if category else None
+        return [self.by_id[gear_id] for gear_id in self.search_index.search(query, limit, accept)]
+
+    def put(self, gear: dict):
+        self.remove(gear["id"])
+        if self.write_log is not None:
+            self.write_log.append((gear["id"], gear))
+        self.by_id[gear["id"]] = gear
+        self.by_category.setdefault(gear["category"], {})[gear["id"]] = gear
+        self.gear_ids[gear["gear_id"]] += 1
+        self.search_index.add(gear)
+        self.touch()
+        snapshot_builder.mark_dirty(gear["category"])
+        cluster_sync.notify("gears")
+
+    def remove(self, gear_id: str):
+        if self.write_log is not None:
+            self.write_log.append((gear_id, None))
+        gear = self.by_id.pop(gear_id, None)
+        if gear is not None:
+            self.by_category.get(gear["category"], {}).pop(gear_id, None)
+            self.gear_ids[gear["gear_id"]] -= 1
+            if self.gear_ids[gear["gear_id"]] <= 0:
+                del self.gear_ids[gear["gear_id"]]
+            snapshot_builder.mark_dirty(gear["category"])
+            cluster_sync.notify("gears")
+        self.search_index.remove(gear_id)
+        self.touch()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "reloads": self.reloads,
+            "size": len(self.by_id),
+            "age_seconds": round(time.monotonic() - self.loaded_at, 3) if self.loaded_at else None,
+            "ttl_seconds": self.ttl,
         }
-        db.users.insert_one(admin_user)
-    
-    # Create sample gears if collection is empty
-    if db.gears.count_documents({}) == 0:
-        sample_gears = [
-            # Joueurs
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Sword of Light",
-                "nickname": "Épée Lumière",
-                "gear_id": "123456789",
-                "image_url": "https://tr.rbxcdn.com/6b9243f5a6b3fa1b54b12c4f1e7f77e4/420/420/Hat/Png",
-                "description": "Une épée brillante qui émet de la lumière",
-                "category": "joueurs"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Basic Shield",
-                "nickname": "Bouclier Basique",
-                "gear_id": "987654321",
-                "image_url": "https://tr.rbxcdn.com/8c5243f5a6b3fa1b54b12c4f1e7f66e5/420/420/Hat/Png",
-                "description": "Un bouclier simple mais efficace",
-                "category": "joueurs"
-            },
-            # Modérateur
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Admin Baton",
-                "nickname": "Bâton Admin",
-                "gear_id": "456789123",
-                "image_url": "https://tr.rbxcdn.com/9d6243f5a6b3fa1b54b12c4f1e7f88e6/420/420/Hat/Png",
-                "description": "Bâton spécial pour les modérateurs",
-                "category": "moderateur"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Moderator Cape",
-                "nickname": "Cape Modo",
-                "gear_id": "789123456",
-                "image_url": "https://tr.rbxcdn.com/ae7243f5a6b3fa1b54b12c4f1e7f99e7/420/420/Hat/Png",
-                "description": "Cape distinctive des modérateurs",
-                "category": "moderateur"
-            },
-            # Événements
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Event Crown",
-                "nickname": "Couronne Événement",
-                "gear_id": "321654987",
-                "image_url": "https://tr.rbxcdn.com/bf8243f5a6b3fa1b54b12c4f1e7faae8/420/420/Hat/Png",
-                "description": "Couronne spéciale pour les événements",
-                "category": "evenements"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Party Launcher",
-                "nickname": "Lance-Fête",
-                "gear_id": "654987321",
-                "image_url": "https://tr.rbxcdn.com/cg9243f5a6b3fa1b54b12c4f1e7fbbbe9/420/420/Hat/Png",
-                "description": "Lance des confettis pour les fêtes",
-                "category": "evenements"
-            },
-            # Interdits
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Banned Weapon",
-                "nickname": "Arme Interdite",
-                "gear_id": "111222333",
-                "image_url": "https://tr.rbxcdn.com/dh0243f5a6b3fa1b54b12c4f1e7fcccea/420/420/Hat/Png",
-                "description": "Arme trop puissante, interdite d'utilisation",
-                "category": "interdits"
-            },
-            {
-                "id": str(uuid.uuid4()),
-                "name": "Exploit Tool",
-                "nickname": "Outil Exploit",
-                "gear_id": "444555666",
-                "image_url": "https://tr.rbxcdn.com/ei1243f5a6b3fa1b54b12c4f1e7fdddeb/420/420/Hat/Png",
-                "description": "Outil causant des bugs, strictement interdit",
-                "category": "interdits"
-            }
-        ]
-        db.gears.insert_many(sample_gears)
+
+gear_cache = GearCatalogCache(CATALOG_CACHE_TTL)
+
+# Static catalog snapshots for CDN/edge serving. After gear writes (debounced)
+# the full catalog and each affected category are written to SNAPSHOT_DIR as
+# content-addressed JSON with .gz/.br siblings, plus a small manifest.json
+# pointing at the current files. A CDN or nginx can serve the directory as-is:
+# versioned files never change (cache them forever), only the manifest does.
+SNAPSHOT_ENABLED = os.environ.get('SNAPSHOT_ENABLED', 'true').lower() == 'true'
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"))
+SNAPSHOT_DEBOUNCE_SECONDS = float(os.environ.get('SNAPSHOT_DEBOUNCE_SECONDS', '0.5'))
+SNAPSHOT_KEEP_VERSIONS = int(os.environ.get('SNAPSHOT_KEEP_VERSIONS', '3'))
+SNAPSHOT_CATEGORIES = ["joueurs", "moderateur", "evenements", "interdits"]
+SNAPSHOT_FILE_PATTERN = re.compile(r"^[a-z]+\.[0-9a-f]{16}\.json$")
+
+def write_atomic(path: str, data: bytes):
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+class CatalogSnapshotBuilder:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.dirty = set()
+        self.task = None
+        self.files = {}
+
+    def mark_dirty(self, *categories):
+        if not SNAPSHOT_ENABLED:
+            return
+        # The full catalog changes whenever any category does
+        self.dirty.update(category for category in categories if category in SNAPSHOT_CATEGORIES)
+        self.dirty.add("catalog")
+        if self.task is None or self.task.done():
+            try:
+                self.task = asyncio.get_running_loop().create_task(self.flush_later())
+            except RuntimeError:
+                pass  # no running loop: the next flush picks the categories up
+
+    async def flush_later(self):
+        await asyncio.sleep(SNAPSHOT_DEBOUNCE_SECONDS)
+        try:
+            await self.flush()
+        except OSError as e:
+            logger.error("Échec de l'écriture des snapshots: %s", e)
+
+    async def rebuild(self):
+        self.dirty.update(["catalog"] + SNAPSHOT_CATEGORIES)
+        await self.flush()
+
+    async def flush(self):
+        loop = asyncio.get_running_loop()
+        # Writes landing while files are being written are picked up by the next pass
+        while self.dirty:
+            dirty, self.dirty = self.dirty, set()
+            for name in dirty:
+                body, etag, _ = await gear_cache.encoded(None if name == "catalog" else name)
+                self.files[name] = await loop.run_in_executor(None, self.write_snapshot, name, body, etag)
+            await loop.run_in_executor(None, self.write_manifest)
+
+    def write_snapshot(self, name: str, body: bytes, etag: str) -> dict:
+        filename = f"{name}.{etag.strip(chr(34))[:16]}.json"
+        path = os.path.join(self.directory, filename)
+        encodings = ["gzip"] + (["br"] if brotli else [])
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            write_atomic(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli:
+                write_atomic(path + ".br", brotli.compress(body))
+            # The plain file goes last: its presence means the variants are complete
+            write_atomic(path, body)
+            self.prune(name)
+        return {"file": filename, "etag": etag, "bytes": len(body), "encodings": encodings}
+
+    def prune(self, name: str):
+        versions = [entry for entry in os.scandir(self.directory)
+                    if entry.name.startswith(name + ".") and SNAPSHOT_FILE_PATTERN.match(entry.name)]
+        versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        # Keep a few old versions for clients that fetched the previous manifest
+        for entry in versions[SNAPSHOT_KEEP_VERSIONS:]:
+            for suffix in ("", ".gz", ".br"):
+                try:
+                    os.remove(entry.path + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def write_manifest(self):
+        # Derived from content, so every worker writes the same version for the same catalog
+        version = hashlib.sha256("".join(self.files[name]["etag"] for name in sorted(self.files)).encode()).hexdigest()[:16]
+        manifest = {"version": version, "generated_at": datetime.utcnow().isoformat() + "Z", "files": self.files}
+        write_atomic(os.path.join(self.directory, "manifest.json"), json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+
+snapshot_builder = CatalogSnapshotBuilder(SNAPSHOT_DIR)
+
+# Thumbnail proxy. Gear images live on the Roblox CDN at 420x420; the grid only
+# needs a fraction of that. Each source URL is fetched once, validated by
+# decoding it, and resized into IMAGE_SIZES variants stored under their content
+# hash in IMAGE_CACHE_DIR (objects/) with a small per-URL pointer file (refs/).
+# The directory is bounded by IMAGE_CACHE_MAX_BYTES with least-recently-served
+# eviction. Failed URLs are remembered for IMAGE_FAILURE_TTL seconds so broken
+# links do not hit the origin on every page view.
+IMAGE_CACHE_DIR = os.environ.get('IMAGE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_cache"))
+IMAGE_CACHE_MAX_BYTES = int(os.environ.get('IMAGE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+IMAGE_ALLOWED_HOSTS = [host.strip().lower() for host in os.environ.get('IMAGE_ALLOWED_HOSTS', 'rbxcdn.com').split(',') if host.strip()]
+IMAGE_FETCH_TIMEOUT = float(os.environ.get('IMAGE_FETCH_TIMEOUT', '5'))
+IMAGE_MAX_SOURCE_BYTES = int(os.environ.get('IMAGE_MAX_SOURCE_BYTES', str(5 * 1024 * 1024)))
+IMAGE_FAILURE_TTL = int(os.environ.get('IMAGE_FAILURE_TTL', '300'))
+# /api/images is public and URLs are caller-chosen, so remembered failures are capped
+IMAGE_FAILURE_MAX_ENTRIES = int(os.environ.get('IMAGE_FAILURE_MAX_ENTRIES', '10000'))
+IMAGE_SIZES = (64, 128, 256)
+IMAGE_SIGNATURES = {b"\x89PNG\r\n\x1a\n": "image/png", b"\xff\xd8\xff": "image/jpeg", b"GIF8": "image/gif", b"RIFF": "image/webp"}
+
+class ImageUnavailable(Exception):
+    pass
+
+def image_url_allowed(url: str) -> bool:
+    """True for http(s) URLs on IMAGE_ALLOWED_HOSTS (a host or any of its subdomains)."""
+    try:
+        parsed = urlsplit(url)
+        host = (parsed.hostname or "").lower()
+        if parsed.port:
+            host = f"{host}:{parsed.port}"
+    except ValueError:
+        return False
+    if parsed.scheme not in ("http", "https") or not host:
+        return False
+    return any(host == allowed or host.endswith("." + allowed) for allowed in IMAGE_ALLOWED_HOSTS)
+
+def sniff_image_type(data: bytes) -> Optional[str]:
+    for signature, media_type in IMAGE_SIGNATURES.items():
+        if data.startswith(signature):
+            if media_type == "image/webp" and data[8:12] != b"WEBP":
+                return None
+            return media_type
+    return None
+
+def render_thumbnails(data: bytes) -> dict:
+    """Return {size: (bytes, media_type)}; raises ImageUnavailable for anything that is not an image."""
+    media_type = sniff_image_type(data)
+    if media_type is None:
+        raise ImageUnavailable("not an image")
+    if Image is None:
+        # Without Pillow every size is the validated original
+        return {size: (data, media_type) for size in IMAGE_SIZES}
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            source.load()
+            # Keep transparency: Roblox renders are PNGs on an alpha background
+            source = source.convert("RGBA")
+            thumbnails = {}
+            for size in IMAGE_SIZES:
+                thumbnail = source.copy()
+                thumbnail.thumbnail((size, size), Image.LANCZOS)
+                buffer = io.BytesIO()
+                thumbnail.save(buffer, format="WEBP", quality=85, method=4)
+                thumbnails[size] = (buffer.getvalue(), "image/webp")
+            return thumbnails
+    except (OSError, Image.DecompressionBombError) as e:
+        raise ImageUnavailable(str(e)) from e
+
+class ImageCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        # content hash -> file size, least recently served first
+        self.objects = OrderedDict()
+        self.total_bytes = 0
+        self.failures = OrderedDict()  # url -> failure time, oldest first
+        self.fetches = {}
+        self.http = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def ref_path(self, url: str, size: int) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "refs", key[:2], f"{key}.{size}")
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def scan(self):
+        """Rebuild the LRU order from disk so the size bound survives restarts."""
+        entries = []
+        for root, _, files in os.walk(os.path.join(self.directory, "objects")):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        with self.lock:
+            self.objects.clear()
+            for _, name, size in sorted(entries):
+                self.objects[name] = size
+            self.total_bytes = sum(self.objects.values())
+        self.evict()
+
+    def lookup(self, url: str, size: int) -> Optional[tuple]:
+        """Return (path, digest, media_type) for a cached variant, or None."""
+        try:
+            with open(self.ref_path(url, size)) as f:
+                digest, media_type = f.read().split()
+        except (OSError, ValueError):
+            return None
+        with self.lock:
+            if digest not in self.objects:
+                return None
+            self.objects.move_to_end(digest)
+        path = self.object_path(digest)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path, digest, media_type
+
+    def store(self, url: str, thumbnails: dict):
+        for size, (data, media_type) in thumbnails.items():
+            digest = hashlib.sha256(data).hexdigest()
+            path = self.object_path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not os.path.exists(path):
+                write_atomic(path, data)
+            with self.lock:
+                if digest not in self.objects:
+                    self.total_bytes += len(data)
+                self.objects[digest] = len(data)
+                self.objects.move_to_end(digest)
+            ref = self.ref_path(url, size)
+            os.makedirs(os.path.dirname(ref), exist_ok=True)
+            write_atomic(ref, f"{digest} {media_type}".encode())
+        self.evict()
+
+    def evict(self):
+        while True:
+            with self.lock:
+                if self.total_bytes <= self.max_bytes or not self.objects:
+                    return
+                digest, size = self.objects.popitem(last=False)
+                self.total_bytes -= size
+            # Dangling refs are detected on lookup and refetched
+            try:
+                os.remove(self.object_path(digest))
+            except FileNotFoundError:
+                pass
+
+    async def fetch(self, url: str) -> bytes:
+        if self.http is None:
+            self.http = httpx.AsyncClient(timeout=IMAGE_FETCH_TIMEOUT, follow_redirects=False)
+        try:
+            async with self.http.stream("GET", url) as response:
+                if response.status_code != 200:
+                    raise ImageUnavailable(f"HTTP {response.status_code}")
+                chunks, received = [], 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > IMAGE_MAX_SOURCE_BYTES:
+                        raise ImageUnavailable("image too large")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+        except httpx.HTTPError as e:
+            raise ImageUnavailable(str(e)) from e
+
+    async def load(self, url: str):
+        data = await self.fetch(url)
+        loop = asyncio.get_running_loop()
+        thumbnails = await loop.run_in_executor(None, render_thumbnails, data)
+        await loop.run_in_executor(None, self.store, url, thumbnails)
+
+    async def get(self, url: str, size: int) -> tuple:
+        """Return (path, digest, media_type), fetching the source at most once across concurrent callers."""
+        cached = self.lookup(url, size)
+        if cached:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        failed_at = self.failures.get(url)
+        if failed_at and time.time() - failed_at < IMAGE_FAILURE_TTL:
+            raise ImageUnavailable("recent failure")
+        fetch = self.fetches.get(url)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self.load(url))
+            self.fetches[url] = fetch
+            fetch.add_done_callback(lambda _: self.fetches.pop(url, None))
+        try:
+            await asyncio.shield(fetch)
+        except (ImageUnavailable, OSError) as e:
+            self.record_failure(url)
+            raise ImageUnavailable(str(e)) from e
+        self.failures.pop(url, None)
+        cached = self.lookup(url, size)
+        if cached is None:
+            raise ImageUnavailable("evicted")
+        return cached
+
+    def record_failure(self, url: str):
+        now = time.time()
+        self.failures.pop(url, None)
+        self.failures[url] = now
+        # Expired entries sit at the front; past the cap the oldest go even if still fresh
+        while self.failures:
+            oldest_url, failed_at = next(iter(self.failures.items()))
+            if now - failed_at < IMAGE_FAILURE_TTL and len(self.failures) <= IMAGE_FAILURE_MAX_ENTRIES:
+                break
+            del self.failures[oldest_url]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.objects),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+image_cache = ImageCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES)
+
+# Background jobs. Post-write side effects (thumbnail prefetch, moderator
+# notifications) are persisted in the jobs collection and run by a few worker
+# tasks, so requests return as soon as the write is done and the work survives
+# restarts. Workers claim due jobs atomically, which also makes the queue safe
+# to share between processes; a job whose worker died is reclaimed once its
+# lease expires. Failures are retried with exponential backoff. Recurring
+# maintenance registers itself with schedule() and runs on the same workers.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '5'))
+JOB_RETRY_BASE_SECONDS = float(os.environ.get('JOB_RETRY_BASE_SECONDS', '2'))
+JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', '300'))
+JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS', '5'))
+JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', str(7 * 24 * 3600)))
+MODERATION_WEBHOOK_URL = os.environ.get('MODERATION_WEBHOOK_URL')
+
+MONGO_INDEXES["jobs"] = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    IndexModel([("status", ASCENDING), ("run_at", ASCENDING)], name="status_run_at"),
+    # Finished jobs are kept for a while for debugging, then dropped by Mongo
+    IndexModel([("finished_at", ASCENDING)], name="finished_at_ttl", expireAfterSeconds=JOB_RETENTION_SECONDS),
+]
+
+JOB_HANDLERS = {}
+
+def job_handler(name: str):
+    def register(func):
+        JOB_HANDLERS[name] = func
+        return func
+    return register
+
+def new_job(name: str, payload: dict) -> dict:
+    now = datetime.utcnow()
+    return {"id": str(uuid.uuid4()), "name": name, "payload": payload, "status": "pending",
+            "attempts": 0, "run_at": now, "created_at": now}
+
+class JobQueue:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.tasks = []
+        self.wakeup = asyncio.Event()
+
+    async def enqueue(self, name: str, payload: dict):
+        await self.enqueue_many([(name, payload)])
+
+    async def enqueue_many(self, jobs: list):
+        if not jobs:
+            return
+        try:
+            await db.jobs.insert_many([new_job(name, payload) for name, payload in jobs])
+        except PyMongoError as e:
+            # The write itself succeeded; losing a side effect must not turn it into an error
+            logger.error("Impossible de planifier %d tâche(s): %s", len(jobs), e)
+            return
+        self.wakeup.set()
+
+    async def schedule(self, name: str, every: float, payload: Optional[dict] = None):
+        """Make sure a recurring job exists; one document per name however many processes call this."""
+        now = datetime.utcnow()
+        await db.jobs.update_one(
+            {"id": f"periodic:{name}"},
+            {"$set": {"every": every},
+             "$setOnInsert": {"name": name, "payload": payload or {}, "status": "pending",
+                              "attempts": 0, "run_at": now, "created_at": now}},
+            upsert=True,
+        )
+        self.wakeup.set()
+
+    def start(self):
+        if not self.tasks:
+            self.tasks = [asyncio.get_running_loop().create_task(self.work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        job = await db.jobs.find_one_and_update(
+            {"$or": [{"status": "pending", "run_at": {"$lte": now}},
+                     {"status": "running", "lease_until": {"$lte": now}}]},
+            {"$set": {"status": "running", "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS)},
+             "$inc": {"attempts": 1}},
+            projection={"_id": 0}
+        )
+        if job is not None:
+            job["attempts"] += 1
+        return job
+
+    async def work(self):
+        while True:
+            try:
+                job = await self.claim()
+            except PyMongoError as e:
+                logger.error("Lecture de la file de tâches impossible: %s", e)
+                job = None
+            if job is None:
+                self.wakeup.clear()
+                waiter = asyncio.ensure_future(self.wakeup.wait())
+                try:
+                    # Not wait_for: it swallows a cancel that lands as the event fires, which hung shutdown
+                    await asyncio.wait([waiter], timeout=JOB_POLL_SECONDS)
+                finally:
+                    waiter.cancel()
+                continue
+            try:
+                await self.run(job)
+            except Exception as e:
+                # Recording the outcome failed; the lease expires and the job is claimed again
+                logger.error("Tâche %s (%s) non enregistrée: %s", job["name"], job["id"], e)
+
+    async def run(self, job: dict):
+        handler = JOB_HANDLERS.get(job["name"])
+        start = time.perf_counter()
+        update = {}
+        try:
+            if handler is None:
+                raise LookupError(f"aucun gestionnaire pour {job['name']}")
+            await handler(job["payload"])
+        except Exception as e:
+            # Handlers talk to the network and the database; any failure is retried
+            outcome = "failed" if handler is None or job["attempts"] >= JOB_MAX_ATTEMPTS else "retry"
+            update["last_error"] = str(e)[:500]
+            if outcome == "failed":
+                logger.error("Tâche %s (%s) abandonnée: %s", job["name"], job["id"], e)
+        else:
+            outcome = "done"
+        job_duration.observe(time.perf_counter() - start, job["name"])
+        job_runs_total.inc(job["name"], outcome)
+
+        if outcome == "retry":
+            backoff = JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1)
+            update.update({"status": "pending", "run_at": datetime.utcnow() + timedelta(seconds=backoff)})
+        elif job.get("every"):
+            # Recurring jobs go back to sleep instead of finishing, even after giving up on a run
+            update.update({"status": "pending", "attempts": 0, "last_run_at": datetime.utcnow(),
+                           "run_at": datetime.utcnow() + timedelta(seconds=job["every"])})
+        else:
+            update.update({"status": outcome, "finished_at": datetime.utcnow()})
+        await db.jobs.update_one({"id": job["id"]}, {"$set": update, "$unset": {"lease_until": ""}})
+
+job_queue = JobQueue(JOB_WORKERS)
+
+@job_handler("prefetch_image")
+async def prefetch_image_job(payload: dict):
+    url = payload["url"]
+    # Straight to the origin: the proxy's failure memo would turn every retry into a no-op
+    if image_url_allowed(url) and image_cache.lookup(url, IMAGE_SIZES[-1]) is None:
+        await image_cache.load(url)
+
+@job_handler("notify_moderators")
+async def notify_moderators_job(payload: dict):
+    # Discord-compatible webhook body
+    async with httpx.AsyncClient(timeout=10) as http:
+        response = await http.post(MODERATION_WEBHOOK_URL, json={"content": payload["message"]})
+        response.raise_for_status()
+
+def gear_side_effects(gear: dict) -> list:
+    return [("prefetch_image", {"url": gear["image_url"]})]
+
+def moderation_notice(message: str) -> list:
+    return [("notify_moderators", {"message": message})] if MODERATION_WEBHOOK_URL else []
+
+# Suggestion retention. Approved and rejected suggestions older than
+# SUGGESTION_RETENTION_DAYS are moved in batches from suggestions to
+# suggestions_archive by a recurring job, so the live collection only holds
+# the moderation queue and recent decisions. The archive is created with zstd
+# block compression where the server supports it and stays queryable through
+# /api/suggestions/archive and the suggestions export.
+SUGGESTION_RETENTION_DAYS = float(os.environ.get('SUGGESTION_RETENTION_DAYS', '90'))
+SUGGESTION_ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('SUGGESTION_ARCHIVE_INTERVAL_SECONDS', '3600'))
+SUGGESTION_ARCHIVE_BATCH_SIZE = int(os.environ.get('SUGGESTION_ARCHIVE_BATCH_SIZE', '500'))
+RESOLVED_STATUSES = ["approved", "rejected"]
+
+MONGO_INDEXES["suggestions_archive"] = [
+    IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    IndexModel([("resolved_at", DESCENDING), ("id", DESCENDING)], name="resolved_at_id"),
+    IndexModel([("status", ASCENDING), ("resolved_at", DESCENDING)], name="status_resolved_at"),
+    IndexModel([("gear_id", ASCENDING)], name="gear_id"),
+    # Archive exports stream in created_at order too
+    IndexModel([("created_at", ASCENDING)], name="created_at"),
+]
+
+async def ensure_archive_collection():
+    if "suggestions_archive" in await db.list_collection_names():
+        return
+    try:
+        await db.create_collection(
+            "suggestions_archive",
+            storageEngine={"wiredTiger": {"configString": "block_compressor=zstd"}},
+        )
+    except Exception as e:
+        # Compression is an optimization only (no zstd on older servers, or another worker
+        # created the collection first); the first insert creates it with default settings
+        logger.info("Collection d'archive non compressée: %s", e)
+
+@job_handler("archive_suggestions")
+async def archive_suggestions_job(payload: dict):
+    cutoff = datetime.utcnow() - timedelta(days=SUGGESTION_RETENTION_DAYS)
+    query = {"status": {"$in": RESOLVED_STATUSES}, "$or": [
+        {"resolved_at": {"$lt": cutoff}},
+        # Decisions made before resolved_at existed only have their submission date
+        {"resolved_at": {"$exists": False}, "created_at": {"$lt": cutoff}},
+    ]}
+    archived = 0
+    while True:
+        batch = await db.suggestions.find(query, {"_id": 0}).limit(SUGGESTION_ARCHIVE_BATCH_SIZE).to_list(None)
+        if not batch:
+            break
+        now = datetime.utcnow()
+        # Upserts make a batch safe to replay if the delete below never happened
+        await db.suggestions_archive.bulk_write([
+            ReplaceOne({"id": suggestion["id"]},
+                       {**suggestion, "resolved_at": suggestion.get("resolved_at", suggestion["created_at"]),
+                        "archived_at": now},
+                       upsert=True)
+            for suggestion in batch
+        ], ordered=False)
+        # The status filter leaves alone anything that changed since it was read
+        result = await db.suggestions.delete_many(
+            {"id": {"$in": [suggestion["id"] for suggestion in batch]}, "status": {"$in": RESOLVED_STATUSES}})
+        archived += result.deleted_count
+    if archived:
+        logger.info("%d suggestion(s) archivée(s)", archived)
+
+# Catalog statistics: gear counts per category and suggestion counts per
+# status, kept in stats_counters by an $inc on every write so reading them never
+# scans. Archived suggestions keep counting under their status. A periodic job
+# recounts both collections and overwrites counters that drifted (a failed
+# increment, an edit made outside the API); a write landing mid-recount can
+# leave a count off by one until the next run.
+STATS_RECONCILE_INTERVAL_SECONDS = int(os.environ.get('STATS_RECONCILE_INTERVAL_SECONDS', '3600'))
+SUGGESTION_STATUSES = ["pending"] + RESOLVED_STATUSES
+
+async def bump_counters(scope: str, changes: dict):
+    # One document per key: categories are free text, so they cannot be field names
+    writes = [
+        UpdateOne({"_id": f"{scope}:{key}"},
+                  {"$inc": {"count": delta}, "$setOnInsert": {"scope": scope, "key": key}}, upsert=True)
+        for key, delta in changes.items() if delta
+    ]
+    if not writes:
+        return
+    try:
+        await db.stats_counters.bulk_write(writes, ordered=False)
+    except PyMongoError as e:
+        # The write being counted succeeded; reconciliation catches up
+        logger.error("Compteurs %s non mis à jour: %s", scope, e)
+
+async def count_by(collection, field: str) -> Counter:
+    counts = Counter()
+    async for row in collection.aggregate([{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]):
+        if row["_id"] is not None:
+            counts[row["_id"]] += row["count"]
+    return counts
+
+@job_handler("reconcile_stats")
+async def reconcile_stats_job(payload: dict):
+    actual = {
+        "gears": await count_by(db.gears, "category"),
+        "suggestions": await count_by(db.suggestions, "status") + await count_by(db.suggestions_archive, "status"),
+    }
+    stored = {}
+    async for counter in db.stats_counters.find({}):
+        stored[counter["_id"]] = counter["count"]
+    writes = []
+    for scope, counts in actual.items():
+        for key in counts.keys() | {counter_id.split(":", 1)[1] for counter_id in stored if counter_id.startswith(f"{scope}:")}:
+            counter_id = f"{scope}:{key}"
+            if stored.get(counter_id) != counts[key]:
+                if counter_id in stored:
+                    logger.warning("Compteur %s corrigé: %d -> %d", counter_id, stored[counter_id], counts[key])
+                writes.append(UpdateOne({"_id": counter_id},
+                                        {"$set": {"scope": scope, "key": key, "count": counts[key]}}, upsert=True))
+    if writes:
+        await db.stats_counters.bulk_write(writes, ordered=False)
+
+# Moderation feed over Server-Sent Events. Write handlers publish events here;
+# each event is serialized once and pushed to every subscriber's bounded queue.
+# A subscriber that falls FEED_CLIENT_BUFFER events behind is disconnected
+# rather than buffered without limit; it reconnects with Last-Event-ID and
+# catches up from the FEED_HISTORY most recent events (or gets a "reset" event
+# telling it to reload the list when it fell further behind than that).
+# With CLUSTER_SYNC, events are relayed through the capped feed_events
+# collection so every worker delivers every event, in the same order.
+FEED_CLIENT_BUFFER = int(os.environ.get('FEED_CLIENT_BUFFER', '100'))
+FEED_HISTORY = int(os.environ.get('FEED_HISTORY', '1000'))
+FEED_HEARTBEAT_SECONDS = float(os.environ.get('FEED_HEARTBEAT_SECONDS', '15'))
+FEED_MAX_CLIENTS = int(os.environ.get('FEED_MAX_CLIENTS', '1000'))
+FEED_EVENTS_BYTES = int(os.environ.get('FEED_EVENTS_BYTES', str(16 * 1024 * 1024)))
+
+class ModerationFeed:
+    def __init__(self, buffer_size: int, history_size: int):
+        self.buffer_size = buffer_size
+        self.subscribers = set()
+        self.history = deque(maxlen=history_size)  # (event id, encoded message)
+        self.sequence = 0
+        self.dropped = 0
+        self.outbox = []
+        self.outbox_ready = asyncio.Event()
+        self.tasks = []
+
+    def publish(self, event: str, data: dict):
+        if CLUSTER_SYNC:
+            # Written in order by flush_outbox, then delivered by every worker's tail()
+            self.outbox.append({"event": event, "data": jsonable_encoder(data), "at": datetime.utcnow()})
+            self.outbox_ready.set()
+        else:
+            self.sequence += 1
+            self.deliver(str(self.sequence), event, jsonable_encoder(data))
+
+    def deliver(self, event_id: str, event: str, data: dict):
+        body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        message = f"id: {event_id}\nevent: {event}\ndata: {body}\n\n".encode("utf-8")
+        self.history.append((event_id, message))
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self.disconnect(queue)
+
+    def disconnect(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        self.dropped += 1
+        # Make room for the sentinel that ends the slow client's stream
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def subscribe(self, last_event_id: Optional[str]) -> asyncio.Queue:
+        queue = asyncio.Queue(self.buffer_size)
+        if last_event_id is not None:
+            ids = [event_id for event_id, _ in self.history]
+            missed = None
+            if last_event_id in ids:
+                missed = [message for _, message in list(self.history)[ids.index(last_event_id) + 1:]]
+            if missed is None or len(missed) >= self.buffer_size:
+                # Too far behind, or an id from before a restart: the client has to reload
+                latest = ids[-1] if ids else ""
+                queue.put_nowait(f"id: {latest}\nevent: reset\ndata: {{}}\n\n".encode("utf-8"))
+            else:
+                for message in missed:
+                    queue.put_nowait(message)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    async def start(self):
+        if not CLUSTER_SYNC or self.tasks:
+            return
+        try:
+            await db.create_collection("feed_events", capped=True, size=FEED_EVENTS_BYTES)
+        except Exception:
+            pass  # already created by another worker
+        loop = asyncio.get_running_loop()
+        self.tasks = [loop.create_task(self.flush_outbox()), loop.create_task(self.tail())]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def flush_outbox(self):
+        while True:
+            await self.outbox_ready.wait()
+            self.outbox_ready.clear()
+            events, self.outbox = self.outbox, []
+            try:
+                await db.feed_events.insert_many(events, ordered=True)
+            except PyMongoError as e:
+                logger.error("Relais du flux de modération impossible: %s", e)
+
+    async def tail(self):
+        since = datetime.utcnow()
+        while True:
+            delivered = {event_id for event_id, _ in self.history}
+            cursor = db.feed_events.find({"at": {"$gte": since}}, cursor_type=CursorType.TAILABLE_AWAIT)
+            try:
+                async for document in cursor:
+                    event_id = str(document["_id"])
+                    if event_id not in delivered:
+                        self.deliver(event_id, document["event"], document["data"])
+                    since = document["at"]
+            except PyMongoError as e:
+                logger.error("Lecture du flux de modération impossible: %s", e)
+            # A tailable cursor dies on an empty collection; reopen it
+            await asyncio.sleep(1)
+
+    def stats(self) -> dict:
+        return {"clients": len(self.subscribers), "sequence": self.sequence, "dropped": self.dropped}
+
+moderation_feed = ModerationFeed(FEED_CLIENT_BUFFER, FEED_HISTORY)
+
+# Cross-worker cache coherence. The sync_versions collection holds one counter
+# per kind of shared in-process state. A worker that changes that state calls
+# notify(); every CLUSTER_SYNC_SECONDS its poller bumps the counters it was
+# notified about (coalescing bursts of writes into one update) and reads all
+# counters, reloading whatever another worker changed. Rate limits use the
+# Mongo store in this mode, and jobs are already claimed through the database.
+CLUSTER_SYNC_SECONDS = float(os.environ.get('CLUSTER_SYNC_SECONDS', '1'))
+
+class ClusterSync:
+    def __init__(self):
+        self.reloaders = {}
+        self.seen = {}
+        self.pending = set()
+        self.task = None
+
+    def register(self, name: str, reload):
+        self.reloaders[name] = reload
+
+    def notify(self, name: str):
+        if CLUSTER_SYNC:
+            self.pending.add(name)
+
+    async def prime(self):
+        """Record the current versions before the initial loads, so startup does not reload twice."""
+        async for document in db.sync_versions.find({}):
+            self.seen[document["_id"]] = document["version"]
+
+    async def sync(self):
+        pending, self.pending = self.pending, set()
+        for name in pending:
+            document = await db.sync_versions.find_one_and_update(
+                {"_id": name}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER)
+            # Skipping a number means another worker wrote too; the read below reloads it
+            if document["version"] == self.seen.get(name, 0) + 1:
+                self.seen[name] = document["version"]
+        async for document in db.sync_versions.find({}):
+            name, version = document["_id"], document["version"]
+            if version != self.seen.get(name) and name in self.reloaders:
+                await self.reloaders[name]()
+                self.seen[name] = version
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(CLUSTER_SYNC_SECONDS)
+            try:
+                await self.sync()
+            except PyMongoError as e:
+                logger.error("Synchronisation entre workers impossible: %s", e)
+
+    def start(self):
+        if CLUSTER_SYNC and self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+cluster_sync = ClusterSync()
+
+async def reload_gear_cache():
+    async with gear_cache.lock:
+        await gear_cache.load()
+
+cluster_sync.register("gears", reload_gear_cache)
+cluster_sync.register("revocations", load_revocations)
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match uses weak comparison, so a W/ prefix from a proxy still matches
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+# Keyset pagination: listings accept ?limit=&cursor= and return {"items", "next"[, "total"]}.
+# Without limit/cursor the endpoints still return a plain list for existing clients.
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', '50'))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '200'))
+GEAR_FIELDS = set(Gear.model_fields)
+SUGGESTION_FIELDS = set(Suggestion.model_fields)
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, *keys: str) -> dict:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(position, dict) and all(isinstance(position.get(key), str) for key in keys):
+            return position
+    except ValueError:
+        pass
+    raise HTTPException(status_code=400, detail="Curseur invalide")
+
+def parse_fields(fields: Optional[str], allowed: set, always: tuple) -> Optional[list]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Champs inconnus: {', '.join(unknown)}")
+    # Sort keys are always returned so the client can rebuild cursors and keys
+    return list(always) + [field for field in requested if field not in always]
+
+def project(document: dict, fields: Optional[list]) -> dict:
+    if fields is None:
+        return document
+    return {field: document[field] for field in fields if field in document}
+
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', '500'))
+
+def check_batch_size(size: int):
+    if size > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Lot trop volumineux (maximum {BULK_MAX_ITEMS} éléments)")
+
+def bulk_report(results: list) -> dict:
+    return {"results": results, "summary": dict(Counter(result["status"] for result in results))}
+
+def gear_from_suggestion(suggestion: dict) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "name": suggestion["name"],
+        "nickname": suggestion["nickname"],
+        "gear_id": suggestion["gear_id"],
+        "image_url": suggestion["image_url"],
+        "description": suggestion["description"],
+        "category": suggestion["category"]
+    }
+
+# Roblox gear_ids that already have a pending suggestion. This set is only a
+# fast path: the partial unique index on suggestions.gear_id stays the source
+# of truth when several workers accept submissions.
+pending_gear_ids = set()
+
+async def load_pending_gear_ids():
+    pending_gear_ids.clear()
+    pending_gear_ids.update(await db.suggestions.distinct("gear_id", {"status": "pending"}))
+
+async def count_duplicate_submission(gear_id: str) -> bool:
+    result = await db.suggestions.update_one(
+        {"gear_id": gear_id, "status": "pending"}, {"$inc": {"submission_count": 1}}
+    )
+    if result.matched_count == 0:
+        # Resolved meanwhile, possibly by another worker
+        pending_gear_ids.discard(gear_id)
+    return result.matched_count > 0
+
+# One-time data migrations, recorded in the migrations collection by name so a
+# boot costs one small read instead of probing (or counting) the data itself.
+# A worker claims a migration before running it; a claim left by a worker that
+# died is taken over after MIGRATION_LEASE_SECONDS. Migrations must be idempotent.
+MIGRATION_LEASE_SECONDS = int(os.environ.get('MIGRATION_LEASE_SECONDS', '600'))
+MIGRATIONS = {}
+
+def migration(name: str):
+    def register(func):
+        MIGRATIONS[name] = func
+        return func
+    return register
+
+SAMPLE_GEARS = [
+    # Joueurs
+    {
+        "name": "Sword of Light",
+        "nickname": "Épée Lumière",
+        "gear_id": "123456789",
+        "image_url": "https://tr.rbxcdn.com/6b9243f5a6b3fa1b54b12c4f1e7f77e4/420/420/Hat/Png",
+        "description": "Une épée brillante qui émet de la lumière",
+        "category": "joueurs"
+    },
+    {
+        "name": "Basic Shield",
+        "nickname": "Bouclier Basique",
+        "gear_id": "987654321",
+        "image_url": "https://tr.rbxcdn.com/8c5243f5a6b3fa1b54b12c4f1e7f66e5/420/420/Hat/Png",
+        "description": "Un bouclier simple mais efficace",
+        "category": "joueurs"
+    },
+    # Modérateur
+    {
+        "name": "Admin Baton",
+        "nickname": "Bâton Admin",
+        "gear_id": "456789123",
+        "image_url": "https://tr.rbxcdn.com/9d6243f5a6b3fa1b54b12c4f1e7f88e6/420/420/Hat/Png",
+        "description": "Bâton spécial pour les modérateurs",
+        "category": "moderateur"
+    },
+    {
+        "name": "Moderator Cape",
+        "nickname": "Cape Modo",
+        "gear_id": "789123456",
+        "image_url": "https://tr.rbxcdn.com/ae7243f5a6b3fa1b54b12c4f1e7f99e7/420/420/Hat/Png",
+        "description": "Cape distinctive des modérateurs",
+        "category": "moderateur"
+    },
+    # Événements
+    {
+        "name": "Event Crown",
+        "nickname": "Couronne Événement",
+        "gear_id": "321654987",
+        "image_url": "https://tr.rbxcdn.com/bf8243f5a6b3fa1b54b12c4f1e7faae8/420/420/Hat/Png",
+        "description": "Couronne spéciale pour les événements",
+        "category": "evenements"
+    },
+    {
+        "name": "Party Launcher",
+        "nickname": "Lance-Fête",
+        "gear_id": "654987321",
+        "image_url": "https://tr.rbxcdn.com/cg9243f5a6b3fa1b54b12c4f1e7fbbbe9/420/420/Hat/Png",
+        "description": "Lance des confettis pour les fêtes",
+        "category": "evenements"
+    },
+    # Interdits
+    {
+        "name": "Banned Weapon",
+        "nickname": "Arme Interdite",
+        "gear_id": "111222333",
+        "image_url": "https://tr.rbxcdn.com/dh0243f5a6b3fa1b54b12c4f1e7fcccea/420/420/Hat/Png",
+        "description": "Arme trop puissante, interdite d'utilisation",
+        "category": "interdits"
+    },
+    {
+        "name": "Exploit Tool",
+        "nickname": "Outil Exploit",
+        "gear_id": "444555666",
+        "image_url": "https://tr.rbxcdn.com/ei1243f5a6b3fa1b54b12c4f1e7fdddeb/420/420/Hat/Png",
+        "description": "Outil causant des bugs, strictement interdit",
+        "category": "interdits"
+    }
+]
+
+@migration("0001_admin_user")
+async def create_admin_user():
+    # $setOnInsert leaves an existing admin (and its password) alone
+    await db.users.update_one(
+        {"username": "admin"},
+        {"$setOnInsert": {"password": await run_password_job(hash_password, "Mouse123890!"), "role": "createur"}},
+        upsert=True,
+    )
+
+@migration("0002_sample_gears")
+async def create_sample_gears():
+    # Only seed an empty catalog; deployments that predate migrations already have theirs
+    if await db.gears.find_one({}, {"_id": 1}) is None:
+        await db.gears.insert_many([{"id": str(uuid.uuid4()), **gear} for gear in SAMPLE_GEARS])
+
+@migration("0003_merge_pending_duplicates")
+async def merge_pending_duplicates():
+    # Queues from before gear_id_pending_unique can hold several pending suggestions
+    # for one gear; keep the oldest, carrying everyone's votes, so the index can build
+    duplicates = db.suggestions.aggregate([
+        {"$match": {"status": "pending"}},
+        {"$sort": {"created_at": ASCENDING}},
+        {"$group": {"_id": "$gear_id", "ids": {"$push": "$id"}, "count": {"$sum": 1},
+                    "submissions": {"$sum": {"$ifNull": ["$submission_count", 1]}}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ])
+    merged = 0
+    async for duplicate in duplicates:
+        keep, *extra = duplicate["ids"]
+        await db.suggestions.update_one({"id": keep}, {"$set": {"submission_count": duplicate["submissions"]}})
+        result = await db.suggestions.delete_many({"id": {"$in": extra}, "status": "pending"})
+        merged += result.deleted_count
+    if merged:
+        await bump_counters("suggestions", {"pending": -merged})
+        logger.info("%d suggestion(s) en double fusionnée(s)", merged)
+
+async def run_migrations():
+    applied = {done["_id"] async for done in db.migrations.find({"status": "done"}, {"_id": 1})}
+    for name, func in MIGRATIONS.items():
+        if name in applied:
+            continue
+        now = datetime.utcnow()
+        try:
+            await db.migrations.update_one(
+                {"_id": name, "status": "running", "started_at": {"$lt": now - timedelta(seconds=MIGRATION_LEASE_SECONDS)}},
+                {"$set": {"status": "running", "started_at": now}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Applied or being applied by another worker
+            continue
+        try:
+            await func()
+        except Exception:
+            await db.migrations.delete_one({"_id": name, "started_at": now})
+            raise
+        await db.migrations.update_one({"_id": name}, {"$set": {"status": "done", "applied_at": datetime.utcnow()}})
+        logger.info("Migration %s appliquée", name)
+
+# Startup only creates the (lazily connecting) Mongo client, so a worker accepts
+# connections right away. Migrations, indexes and cache warm-up then run in the
+# background, retried until they succeed (usually: until Mongo answers); /readyz turns 200 once they are done
+# and the worker can take traffic, and 503 again while it shuts down.
+STARTUP_RETRY_MAX_SECONDS = float(os.environ.get('STARTUP_RETRY_MAX_SECONDS', '30'))
+
+class Lifecycle:
+    def __init__(self):
+        self.ready = asyncio.Event()
+        self.revocations_loaded = False
+        self.draining = False
+        self.last_error = None
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.warm_up())
+
+    async def warm_up(self):
+        attempt = 0
+        while True:
+            try:
+                await warm_up_worker()
+                break
+            except Exception as e:
+                attempt += 1
+                self.last_error = str(e)
+                delay = min(2 ** attempt, STARTUP_RETRY_MAX_SECONDS)
+                logger.warning("Démarrage incomplet (nouvel essai dans %ss): %s", delay, e)
+                await asyncio.sleep(delay)
+        self.last_error = None
+        self.ready.set()
+
+    async def wait_ready(self):
+        await self.ready.wait()
+
+    async def stop(self):
+        self.draining = True
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    def status(self) -> dict:
+        if self.draining:
+            return {"status": "draining"}
+        if not self.ready.is_set():
+            return {"status": "starting", "error": self.last_error}
+        return {"status": "ready"}
+
+lifecycle = Lifecycle()
+
+async def warm_up_worker():
+    # Every step is idempotent, so a retry after a Mongo outage simply starts over
+    await ensure_archive_collection()
+    # Migrations first: some clean up data that would block an index build
+    await run_migrations()
+    await ensure_indexes()
+    if MONGO_INDEX_CHECK:
+        await check_indexes()
+    if CLUSTER_SYNC:
+        await cluster_sync.prime()
+    if TOKEN_REVOCATION_PERSIST:
+        await load_revocations()
+    lifecycle.revocations_loaded = True
+    async with gear_cache.lock:
+        await gear_cache.load()
+    await load_pending_gear_ids()
+    if SNAPSHOT_ENABLED:
+        await snapshot_builder.rebuild()
+    await asyncio.get_running_loop().run_in_executor(None, image_cache.scan)
+    if SUGGESTION_RETENTION_DAYS > 0:
+        await job_queue.schedule("archive_suggestions", SUGGESTION_ARCHIVE_INTERVAL_SECONDS)
+    await job_queue.schedule("reconcile_stats", STATS_RECONCILE_INTERVAL_SECONDS)
+    job_queue.start()
+    cluster_sync.start()
+    await moderation_feed.start()
+
+async def startup_event():
+    connect_mongo()
+    lifecycle.start()
+
+async def shutdown_event():
+    await lifecycle.stop()
+    await job_queue.stop()
+    await cluster_sync.stop()
+    await moderation_feed.stop()
+    if image_cache.http is not None:
+        await image_cache.http.aclose()
+
+@app.get("/healthz")
+async def liveness():
+    # The event loop answers: the process is alive, whatever the state of Mongo
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readiness():
+    state = lifecycle.status()
+    return Response(content=json.dumps(state), media_type="application/json",
+                    status_code=200 if state["status"] == "ready" else 503)
 
 # Auth endpoints
-@app.post("/api/auth/login")
+@app.post("/api/auth/login", dependencies=[Depends(RateLimit("login", LOGIN_IP_RATE))])
 async def login(user_data: UserLogin):
-    user = db.users.find_one({"username": user_data.username})
-    if not user or not verify_password(user_data.password, user["password"]):
+    # Checked before bcrypt so guessing one account's password stays cheap to refuse
+    await enforce_rate_limit(f"login:user:{user_data.username}", LOGIN_USERNAME_RATE)
+    user = await db.users.find_one({"username": user_data.username})
+    if not user or not await run_password_job(verify_password, user_data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Nom d'utilisateur ou mot de passe incorrect")
     
     token = create_access_token(user["username"], user["role"])
     return {"access_token": token, "token_type": "bearer", "role": user["role"]}
 
+@app.post("/api/auth/logout")
+async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    _, exp, _ = verify_token(credentials.credentials)
+    await revoke_token(credentials.credentials, exp)
+    return {"message": "Déconnexion réussie"}
+
+@app.post("/api/auth/revoke")
+async def revoke_user(revoke_data: TokenRevoke, current_user: User = Depends(get_current_user)):
+    if current_user.role == "moderateur":
+        raise HTTPException(status_code=403, detail="Accès refusé")
+    
+    user = await db.users.find_one({"username": revoke_data.username})
+    if not user:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    if current_user.role == "responsable" and user["role"] != "moderateur":
+        raise HTTPException(status_code=403, detail="Vous ne pouvez révoquer que des comptes modérateur")
+    
+    await revoke_user_tokens(revoke_data.username)
+    return {"message": "Sessions de l'utilisateur révoquées"}
+
 @app.post("/api/auth/create-user")
 async def create_user(user_data: UserCreate, current_user: User = Depends(get_current_user)):
     if current_user.role == "moderateur":
@@ -228,31 +2168,64 @@ async def create_user(user_data: UserCreate, current_user: User = Depends(get_cu
     if current_user.role == "responsable" and user_data.role not in ["moderateur"]:
         raise HTTPException(status_code=403, detail="Vous ne pouvez créer que des comptes modérateur")
     
-    if db.users.find_one({"username": user_data.username}):
+    if await db.users.find_one({"username": user_data.username}):
         raise HTTPException(status_code=400, detail="Nom d'utilisateur déjà existant")
     
-    hashed_password = hash_password(user_data.password)
+    hashed_password = await run_password_job(hash_password, user_data.password)
     new_user = {
         "username": user_data.username,
         "password": hashed_password,
         "role": user_data.role
     }
-    db.users.insert_one(new_user)
+    await db.users.insert_one(new_user)
     return {"message": "Utilisateur créé avec succès"}
 
 # Gear endpoints
 @app.get("/api/gears")
-async def get_gears(category: Optional[str] = None):
-    query = {}
-    if category:
-        query["category"] = category
-    
-    gears = list(db.gears.find(query, {"_id": 0}))
-    return gears
+async def get_gears(
+    request: Request,
+    category: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_total: bool = False,
+):
+    projection = parse_fields(fields, GEAR_FIELDS, ("id",))
+    if limit is not None or cursor is not None:
+        after = decode_cursor(cursor, "id")["id"] if cursor else None
+        gears, last_id, total = await gear_cache.page(category, after, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+        page = {
+            "items": [project(gear, projection) for gear in gears],
+            "next": encode_cursor({"id": last_id}) if last_id else None,
+        }
+        if include_total:
+            page["total"] = total
+        return page
+    if projection is not None:
+        return [project(gear, projection) for gear in await gear_cache.list(category)]
+
+    body, etag, last_modified = await gear_cache.encoded(category)
+    # no-cache lets browsers keep the body but revalidate it with If-None-Match on every poll
+    headers = {"ETag": etag, "Last-Modified": last_modified, "Cache-Control": "no-cache"}
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Declared before /api/gears/{gear_id} so "search" is not taken for a gear id
+@app.get("/api/gears/search")
+async def search_gears(
+    q: str = Query(..., min_length=1, max_length=100),
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1),
+    fields: Optional[str] = None,
+):
+    projection = parse_fields(fields, GEAR_FIELDS, ("id",))
+    gears = await gear_cache.search(q, category, min(limit, MAX_PAGE_SIZE))
+    return [project(gear, projection) for gear in gears]
 
 @app.get("/api/gears/{gear_id}")
 async def get_gear(gear_id: str):
-    gear = db.gears.find_one({"id": gear_id}, {"_id": 0})
+    gear = await gear_cache.get(gear_id)
     if not gear:
         raise HTTPException(status_code=404, detail="Gear non trouvé")
     return gear
@@ -271,7 +2244,13 @@ async def create_gear(gear_data: GearCreate, current_user: User = Depends(get_cu
         "description": gear_data.description,
         "category": gear_data.category
     }
-    db.gears.insert_one(new_gear)
+    # insert a copy so the driver's generated _id does not leak into the response
+    await db.gears.insert_one(dict(new_gear))
+    await bump_counters("gears", {new_gear["category"]: 1})
+    gear_cache.put(dict(new_gear))
+    moderation_feed.publish("gear.created", new_gear)
+    await resolve_duplicate_suggestions([new_gear["gear_id"]])
+    await job_queue.enqueue_many(gear_side_effects(new_gear))
     return {"message": "Gear créé avec succès", "gear": new_gear}
 
 @app.put("/api/gears/{gear_id}")
@@ -279,12 +2258,26 @@ async def update_gear(gear_id: str, gear_data: GearUpdate, current_user: User =
     if current_user.role == "moderateur":
         raise HTTPException(status_code=403, detail="Accès refusé")
     
-    gear = db.gears.find_one({"id": gear_id})
-    if not gear:
+    update_data = {k: v for k, v in gear_data.dict().items() if v is not None}
+    if update_data:
+        # The previous version tells us which category counter to move
+        previous = await db.gears.find_one_and_update(
+            {"id": gear_id}, {"$set": update_data}, projection={"_id": 0}
+        )
+    else:
+        previous = await db.gears.find_one({"id": gear_id}, {"_id": 0})
+    if not previous:
         raise HTTPException(status_code=404, detail="Gear non trouvé")
+    gear = {**previous, **update_data}
+    if gear["category"] != previous["category"]:
+        await bump_counters("gears", {previous["category"]: -1, gear["category"]: 1})
     
-    update_data = {k: v for k, v in gear_data.dict().items() if v is not None}
-    db.gears.update_one({"id": gear_id}, {"$set": update_data})
+    gear_cache.put(gear)
+    moderation_feed.publish("gear.updated", gear)
+    if gear["gear_id"] != previous["gear_id"]:
+        await resolve_duplicate_suggestions([gear["gear_id"]])
+    if gear_data.image_url is not None:
+        await job_queue.enqueue_many(gear_side_effects(gear))
     return {"message": "Gear mis à jour avec succès"}
 
 @app.delete("/api/gears/{gear_id}")
@@ -292,14 +2285,241 @@ async def delete_gear(gear_id: str, current_user: User = Depends(get_current_use
     if current_user.role == "moderateur":
         raise HTTPException(status_code=403, detail="Accès refusé")
     
-    result = db.gears.delete_one({"id": gear_id})
-    if result.deleted_count == 0:
+    gear = await db.gears.find_one_and_delete({"id": gear_id}, projection={"category": 1})
+    if not gear:
         raise HTTPException(status_code=404, detail="Gear non trouvé")
+    await bump_counters("gears", {gear["category"]: -1})
+    gear_cache.remove(gear_id)
+    moderation_feed.publish("gear.deleted", {"id": gear_id})
     return {"message": "Gear supprimé avec succès"}
 
+@app.get("/metrics")
+async def get_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    # Cache counters are kept by the caches themselves and read at scrape time
+    cache_stats = {"gears": gear_cache.stats(), "tokens": token_cache.stats(), "images": image_cache.stats()}
+    for metric, key, kind in (("cache_hits_total", "hits", "counter"),
+                              ("cache_misses_total", "misses", "counter"),
+                              ("cache_entries", "size", "gauge")):
+        lines.append(f"# TYPE {metric} {kind}")
+        for cache_name, stats in cache_stats.items():
+            lines.append(f'{metric}{{cache="{cache_name}"}} {stats[key]}')
+    lines.append("# TYPE password_jobs_pending gauge")
+    lines.append(f"password_jobs_pending {password_jobs_pending}")
+    feed_stats = moderation_feed.stats()
+    lines.append("# TYPE moderation_feed_clients gauge")
+    lines.append(f"moderation_feed_clients {feed_stats['clients']}")
+    lines.append("# TYPE moderation_feed_dropped_total counter")
+    lines.append(f"moderation_feed_dropped_total {feed_stats['dropped']}")
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
+@app.get("/api/snapshots/manifest.json")
+async def get_snapshot_manifest():
+    path = os.path.join(SNAPSHOT_DIR, "manifest.json")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Snapshot indisponible")
+    return FileResponse(path, media_type="application/json", headers={"Cache-Control": "public, max-age=10"})
+
+@app.get("/api/snapshots/{filename}")
+async def get_snapshot(filename: str, request: Request):
+    if not SNAPSHOT_FILE_PATTERN.match(filename):
+        raise HTTPException(status_code=404, detail="Snapshot indisponible")
+    path = os.path.join(SNAPSHOT_DIR, filename)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Snapshot indisponible")
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept-Encoding"}
+    accept_encoding = request.headers.get("accept-encoding", "")
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encoding in accept_encoding and os.path.exists(path + suffix):
+            headers["Content-Encoding"] = encoding
+            return FileResponse(path + suffix, media_type="application/json", headers=headers)
+    return FileResponse(path, media_type="application/json", headers=headers)
+
+@app.get("/api/images")
+async def get_image(request: Request, url: str, size: int = 256):
+    if size not in IMAGE_SIZES:
+        raise HTTPException(status_code=400, detail=f"Taille invalide (valeurs possibles: {', '.join(map(str, IMAGE_SIZES))})")
+    if not image_url_allowed(url):
+        raise HTTPException(status_code=400, detail="URL d'image non autorisée")
+    try:
+        path, digest, media_type = await image_cache.get(url, size)
+    except ImageUnavailable:
+        raise HTTPException(status_code=404, detail="Image indisponible")
+    etag = f'"{digest[:32]}"'
+    # A given source URL is immutable on the Roblox CDN, so variants can be cached for a long time
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=2592000"}
+    # Variants have no meaningful modification time, so only If-None-Match applies
+    if is_not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+@app.get("/api/moderation/feed")
+async def get_moderation_feed(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    verify_token(credentials.credentials)
+    if len(moderation_feed.subscribers) >= FEED_MAX_CLIENTS:
+        raise HTTPException(status_code=503, detail="Trop de connexions au flux", headers={"Retry-After": "5"})
+    queue = moderation_feed.subscribe(request.headers.get("last-event-id"))
+
+    async def stream():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), FEED_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Heartbeats keep proxies from closing idle streams and end revoked or expired sessions
+                    try:
+                        verify_token(credentials.credentials)
+                    except HTTPException:
+                        return
+                    message = b": ping\n\n"
+                # Send whatever else is already queued in the same write
+                messages = [message]
+                while message is not None and not queue.empty():
+                    message = queue.get_nowait()
+                    messages.append(message)
+                if messages[-1] is None:
+                    yield b"".join(messages[:-1])
+                    return
+                yield b"".join(messages)
+        finally:
+            moderation_feed.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/api/cache/stats")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
+    return {"gears": gear_cache.stats(), "tokens": token_cache.stats(), "images": image_cache.stats()}
+
+@app.get("/api/stats")
+async def get_stats():
+    counts = {
+        "gears": {category: 0 for category in SNAPSHOT_CATEGORIES},
+        "suggestions": {status: 0 for status in SUGGESTION_STATUSES},
+    }
+    async for counter in db.stats_counters.find({}, {"_id": 0}):
+        counts.setdefault(counter["scope"], {})[counter["key"]] = counter["count"]
+    return {
+        "gears": {"total": sum(counts["gears"].values()), "by_category": counts["gears"]},
+        "suggestions": {"total": sum(counts["suggestions"].values()), "by_status": counts["suggestions"]},
+    }
+
+@app.post("/api/gears/bulk")
+async def bulk_gears(bulk_data: GearBulkRequest, current_user: User = Depends(get_current_user)):
+    if current_user.role == "moderateur":
+        raise HTTPException(status_code=403, detail="Accès refusé")
+    check_batch_size(len(bulk_data.operations))
+
+    # One lookup tells us which update/delete targets exist, and their category for the counters
+    target_ids = list({op.id for op in bulk_data.operations if op.id})
+    existing_categories = {}
+    if target_ids:
+        async for gear in db.gears.find({"id": {"$in": target_ids}}, {"_id": 0, "id": 1, "category": 1}):
+            existing_categories[gear["id"]] = gear["category"]
+
+    results = [None] * len(bulk_data.operations)
+    writes = []  # (operation index, pymongo request)
+    created = {}
+    for index, op in enumerate(bulk_data.operations):
+        if op.action == "create":
+            try:
+                gear_data = GearCreate(**(op.gear or {}))
+            except ValidationError:
+                results[index] = {"index": index, "status": "error", "detail": "Gear invalide"}
+                continue
+            new_gear = {"id": str(uuid.uuid4()), **gear_data.dict()}
+            created[index] = new_gear
+            writes.append((index, InsertOne(dict(new_gear))))
+        elif op.action in ("update", "delete"):
+            if op.id not in existing_categories:
+                results[index] = {"index": index, "id": op.id, "status": "not_found"}
+                continue
+            if op.action == "delete":
+                writes.append((index, DeleteOne({"id": op.id})))
+                continue
+            try:
+                update_data = {k: v for k, v in GearUpdate(**(op.gear or {})).dict().items() if v is not None}
+            except ValidationError:
+                update_data = None
+            if not update_data:
+                results[index] = {"index": index, "id": op.id, "status": "error", "detail": "Mise à jour invalide"}
+                continue
+            writes.append((index, UpdateOne({"id": op.id}, {"$set": update_data})))
+        else:
+            results[index] = {"index": index, "status": "error", "detail": "Action inconnue"}
+
+    failed = {}
+    if writes:
+        try:
+            await db.gears.bulk_write([request for _, request in writes], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[writes[error["index"]][0]] = error.get("errmsg", "Erreur d'écriture")
+
+    updated_ids = set()
+    image_updates = set()
+    side_effects = []
+    category_counts = Counter()
+    touched_ids = set()  # existing gears updated or deleted by this batch
+    catalog_gear_ids = []  # Roblox gear_ids created or updated by this batch
+    for index, _ in writes:
+        op = bulk_data.operations[index]
+        if index in failed:
+            results[index] = {"index": index, "id": op.id, "status": "error", "detail": failed[index]}
+        elif op.action == "create":
+            category_counts[created[index]["category"]] += 1
+            catalog_gear_ids.append(created[index]["gear_id"])
+            gear_cache.put(created[index])
+            moderation_feed.publish("gear.created", created[index])
+            side_effects.extend(gear_side_effects(created[index]))
+            results[index] = {"index": index, "id": created[index]["id"], "status": "created"}
+        elif op.action == "update":
+            touched_ids.add(op.id)
+            updated_ids.add(op.id)
+            if (op.gear or {}).get("image_url") is not None:
+                image_updates.add(op.id)
+            results[index] = {"index": index, "id": op.id, "status": "updated"}
+        else:
+            touched_ids.add(op.id)
+            gear_cache.remove(op.id)
+            moderation_feed.publish("gear.deleted", {"id": op.id})
+            results[index] = {"index": index, "id": op.id, "status": "deleted"}
+
+    # Read back what the batch left behind: several operations on one id make
+    # the category before the batch the only reliable starting point
+    final_categories = {}
+    if touched_ids:
+        async for gear in db.gears.find({"id": {"$in": list(touched_ids)}}, {"_id": 0}):
+            final_categories[gear["id"]] = gear["category"]
+            if gear["id"] in updated_ids:
+                catalog_gear_ids.append(gear["gear_id"])
+                gear_cache.put(gear)
+                moderation_feed.publish("gear.updated", gear)
+                if gear["id"] in image_updates:
+                    side_effects.extend(gear_side_effects(gear))
+    for gear_id in touched_ids:
+        category_counts[existing_categories[gear_id]] -= 1
+        if gear_id in final_categories:
+            category_counts[final_categories[gear_id]] += 1
+    await bump_counters("gears", category_counts)
+    await resolve_duplicate_suggestions(catalog_gear_ids)
+    await job_queue.enqueue_many(side_effects)
+    return bulk_report(results)
+
 # Suggestion endpoints
-@app.post("/api/suggestions")
+@app.post("/api/suggestions", dependencies=[Depends(RateLimit("suggestions", SUGGESTION_IP_RATE))])
 async def create_suggestion(suggestion_data: SuggestionCreate):
+    gear_id = suggestion_data.gear_id
+    await gear_cache.ensure_fresh()
+    if gear_cache.gear_ids[gear_id]:
+        raise HTTPException(status_code=409, detail="Ce gear est déjà dans le catalogue")
+    duplicate = {"message": "Ce gear est déjà en attente de validation, merci pour votre vote", "duplicate": True}
+    if gear_id in pending_gear_ids and await count_duplicate_submission(gear_id):
+        return duplicate
+    
     new_suggestion = {
         "id": str(uuid.uuid4()),
         "name": suggestion_data.name,
@@ -309,40 +2529,194 @@ async def create_suggestion(suggestion_data: SuggestionCreate):
         "description": suggestion_data.description,
         "category": suggestion_data.category,
         "status": "pending",
-        "created_at": datetime.utcnow()
+        "created_at": datetime.utcnow(),
+        "submission_count": 1
     }
-    db.suggestions.insert_one(new_suggestion)
+    try:
+        await db.suggestions.insert_one(dict(new_suggestion))
+    except DuplicateKeyError:
+        # Another worker stored a pending suggestion for this gear first
+        pending_gear_ids.add(gear_id)
+        if await count_duplicate_submission(gear_id):
+            return duplicate
+        raise HTTPException(status_code=409, detail="Suggestion en conflit, réessayez")
+    await bump_counters("suggestions", {"pending": 1})
+    pending_gear_ids.add(gear_id)
+    moderation_feed.publish("suggestion.created", new_suggestion)
+    await job_queue.enqueue_many(
+        gear_side_effects(new_suggestion)
+        + moderation_notice(f"📥 Nouvelle suggestion: {new_suggestion['name']} (#{gear_id}, {new_suggestion['category']})")
+    )
     return {"message": "Suggestion soumise avec succès"}
 
 @app.get("/api/suggestions")
-async def get_suggestions(current_user: User = Depends(get_current_user)):
-    suggestions = list(db.suggestions.find({}, {"_id": 0}))
-    return suggestions
+async def get_suggestions(
+    status: str = "pending",
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include_total: bool = False,
+    current_user: User = Depends(get_current_user),
+):
+    # The moderation queue by default; status=all also lists decisions not archived yet
+    query = {}
+    if status != "all":
+        query["status"] = status
+    fields = parse_fields(fields, SUGGESTION_FIELDS, ("id", "created_at"))
+    projection = {"_id": 0}
+    if fields is not None:
+        projection.update({field: 1 for field in fields})
+
+    if limit is None and cursor is None:
+        return await db.suggestions.find(query, projection).to_list(None)
+
+    # Newest first; id breaks ties between suggestions created in the same millisecond
+    page_query = dict(query)
+    if cursor:
+        position = decode_cursor(cursor, "created_at", "id")
+        try:
+            created_at = datetime.fromisoformat(position["created_at"])
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Curseur invalide")
+        page_query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": position["id"]}},
+        ]
+    page_size = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    # Fetch one extra document to learn whether another page exists
+    suggestions = await db.suggestions.find(page_query, projection).sort(
+        [("created_at", DESCENDING), ("id", DESCENDING)]
+    ).limit(page_size + 1).to_list(None)
+    next_cursor = None
+    if len(suggestions) > page_size:
+        suggestions = suggestions[:page_size]
+        last = suggestions[-1]
+        next_cursor = encode_cursor({"created_at": last["created_at"].isoformat(), "id": last["id"]})
+    page = {"items": suggestions, "next": next_cursor}
+    if include_total:
+        page["total"] = await db.suggestions.count_documents(query)
+    return page
+
+@app.get("/api/suggestions/archive")
+async def get_archived_suggestions(
+    status: Optional[str] = None,
+    gear_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+):
+    query = {}
+    if status:
+        query["status"] = status
+    if gear_id:
+        query["gear_id"] = gear_id
+    # Most recent decisions first, same keyset scheme as the live listing
+    page_query = dict(query)
+    if cursor:
+        position = decode_cursor(cursor, "resolved_at", "id")
+        try:
+            resolved_at = datetime.fromisoformat(position["resolved_at"])
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Curseur invalide")
+        page_query["$or"] = [
+            {"resolved_at": {"$lt": resolved_at}},
+            {"resolved_at": resolved_at, "id": {"$lt": position["id"]}},
+        ]
+    page_size = min(limit, MAX_PAGE_SIZE)
+    suggestions = await db.suggestions_archive.find(page_query, {"_id": 0}).sort(
+        [("resolved_at", DESCENDING), ("id", DESCENDING)]
+    ).limit(page_size + 1).to_list(None)
+    next_cursor = None
+    if len(suggestions) > page_size:
+        suggestions = suggestions[:page_size]
+        last = suggestions[-1]
+        next_cursor = encode_cursor({"resolved_at": last["resolved_at"].isoformat(), "id": last["id"]})
+    return {"items": suggestions, "next": next_cursor}
+
+async def suggestion_not_pending(suggestion_id: str) -> HTTPException:
+    if await db.suggestions.find_one({"id": suggestion_id}, {"_id": 1}):
+        return HTTPException(status_code=409, detail="Suggestion déjà traitée")
+    return HTTPException(status_code=404, detail="Suggestion non trouvée")
+
+async def claim_and_create_gear(suggestion_id: str, session=None) -> tuple:
+    """Return (suggestion, new gear), or (suggestion, None) when the gear was already in the catalog."""
+    # The status guard makes the claim atomic: of concurrent approve/reject calls only one matches
+    suggestion = await db.suggestions.find_one_and_update(
+        {"id": suggestion_id, "status": "pending"}, {"$set": {"status": "approved", "resolved_at": datetime.utcnow()}},
+        projection={"_id": 0}, session=session
+    )
+    if not suggestion:
+        raise await suggestion_not_pending(suggestion_id)
+    if gear_cache.gear_ids[suggestion["gear_id"]]:
+        # Added by hand since it was submitted: close it rather than duplicate the gear
+        await db.suggestions.update_one(
+            {"id": suggestion_id, "status": "approved"},
+            {"$set": {"status": "rejected", "resolution": "duplicate"}}, session=session
+        )
+        return suggestion, None
+    
+    # Create gear from suggestion
+    new_gear = gear_from_suggestion(suggestion)
+    try:
+        await db.gears.insert_one(dict(new_gear), session=session)
+    except PyMongoError:
+        if session is None:
+            # Without a transaction, hand the suggestion back so it can be approved again
+            await db.suggestions.update_one(
+                {"id": suggestion_id, "status": "approved"},
+                {"$set": {"status": "pending"}, "$unset": {"resolved_at": ""}}
+            )
+        raise
+    return suggestion, new_gear
+
+async def close_duplicate_suggestions(duplicates: dict):
+    """Count and announce suggestions closed because their gear is already in the catalog."""
+    if not duplicates:
+        return
+    await bump_counters("suggestions", {"pending": -len(duplicates), "rejected": len(duplicates)})
+    for suggestion_id, suggestion in duplicates.items():
+        pending_gear_ids.discard(suggestion["gear_id"])
+        moderation_feed.publish("suggestion.rejected", {"id": suggestion_id, "resolution": "duplicate"})
+
+async def resolve_duplicate_suggestions(gear_ids):
+    """Close the pending suggestions for gears that just entered the catalog."""
+    gear_ids = list(set(gear_ids))
+    if not gear_ids:
+        return
+    pending = await db.suggestions.find(
+        {"gear_id": {"$in": gear_ids}, "status": "pending"}, {"_id": 0, "id": 1}
+    ).to_list(None)
+    if pending:
+        duplicates, _ = await claim_pending_suggestions(
+            [suggestion["id"] for suggestion in pending], "rejected", resolution="duplicate")
+        await close_duplicate_suggestions(duplicates)
 
 @app.post("/api/suggestions/{suggestion_id}/approve")
 async def approve_suggestion(suggestion_id: str, current_user: User = Depends(get_current_user)):
     if current_user.role == "moderateur":
         raise HTTPException(status_code=403, detail="Accès refusé")
     
-    suggestion = db.suggestions.find_one({"id": suggestion_id})
-    if not suggestion:
-        raise HTTPException(status_code=404, detail="Suggestion non trouvée")
-    
-    # Create gear from suggestion
-    new_gear = {
-        "id": str(uuid.uuid4()),
-        "name": suggestion["name"],
-        "nickname": suggestion["nickname"],
-        "gear_id": suggestion["gear_id"],
-        "image_url": suggestion["image_url"],
-        "description": suggestion["description"],
-        "category": suggestion["category"]
-    }
-    db.gears.insert_one(new_gear)
-    
-    # Update suggestion status
-    db.suggestions.update_one({"id": suggestion_id}, {"$set": {"status": "approved"}})
+    await gear_cache.ensure_fresh()
+    if MONGO_TRANSACTIONS:
+        async with await client.start_session() as session:
+            async with session.start_transaction():
+                suggestion, new_gear = await claim_and_create_gear(suggestion_id, session)
+    else:
+        suggestion, new_gear = await claim_and_create_gear(suggestion_id)
+    if new_gear is None:
+        await close_duplicate_suggestions({suggestion_id: suggestion})
+        raise HTTPException(status_code=409, detail="Ce gear est déjà dans le catalogue, suggestion fermée comme doublon")
     
+    await bump_counters("suggestions", {"pending": -1, "approved": 1})
+    await bump_counters("gears", {new_gear["category"]: 1})
+    gear_cache.put(new_gear)
+    pending_gear_ids.discard(new_gear["gear_id"])
+    moderation_feed.publish("suggestion.approved", {"id": suggestion_id, "gear": new_gear})
+    moderation_feed.publish("gear.created", new_gear)
+    await job_queue.enqueue_many(
+        gear_side_effects(new_gear)
+        + moderation_notice(f"✅ {current_user.username} a approuvé {new_gear['name']} (#{new_gear['gear_id']})")
+    )
     return {"message": "Suggestion approuvée et gear créé"}
 
 @app.post("/api/suggestions/{suggestion_id}/reject")
@@ -350,7 +2724,15 @@ async def reject_suggestion(suggestion_id: str, current_user: User = Depends(get
     if current_user.role == "moderateur":
         raise HTTPException(status_code=403, detail="Accès refusé")
     
-    db.suggestions.update_one({"id": suggestion_id}, {"$set": {"status": "rejected"}})
+    suggestion = await db.suggestions.find_one_and_update(
+        {"id": suggestion_id, "status": "pending"}, {"$set": {"status": "rejected", "resolved_at": datetime.utcnow()}},
+        projection={"gear_id": 1}
+    )
+    if not suggestion:
+        raise await suggestion_not_pending(suggestion_id)
+    await bump_counters("suggestions", {"pending": -1, "rejected": 1})
+    pending_gear_ids.discard(suggestion["gear_id"])
+    moderation_feed.publish("suggestion.rejected", {"id": suggestion_id})
     return {"message": "Suggestion rejetée"}
 
 @app.delete("/api/suggestions/{suggestion_id}")
@@ -358,11 +2740,226 @@ async def delete_suggestion(suggestion_id: str, current_user: User = Depends(get
     if current_user.role == "moderateur":
         raise HTTPException(status_code=403, detail="Accès refusé")
     
-    result = db.suggestions.delete_one({"id": suggestion_id})
-    if result.deleted_count == 0:
+    suggestion = await db.suggestions.find_one_and_delete({"id": suggestion_id}, projection={"gear_id": 1, "status": 1})
+    if not suggestion:
         raise HTTPException(status_code=404, detail="Suggestion non trouvée")
+    await bump_counters("suggestions", {suggestion["status"]: -1})
+    if suggestion["status"] == "pending":
+        pending_gear_ids.discard(suggestion["gear_id"])
+    moderation_feed.publish("suggestion.deleted", {"id": suggestion_id})
     return {"message": "Suggestion supprimée"}
 
+async def find_suggestions_by_id(ids: List[str], batch_id: Optional[str] = None, session=None) -> dict:
+    query = {"id": {"$in": ids}}
+    if batch_id:
+        query["moderation_batch"] = batch_id
+    suggestions = {}
+    async for suggestion in db.suggestions.find(query, {"_id": 0, "moderation_batch": 0}, session=session):
+        suggestions[suggestion["id"]] = suggestion
+    return suggestions
+
+async def claim_pending_suggestions(ids: List[str], new_status: str, session=None,
+                                    resolution: Optional[str] = None) -> tuple:
+    """Atomically move pending suggestions to new_status; return (claimed, others) by id."""
+    # Tagging the batch lets us read back exactly the documents this call won,
+    # even when another moderator is processing the same ids concurrently
+    batch_id = str(uuid.uuid4())
+    changes = {"status": new_status, "resolved_at": datetime.utcnow(), "moderation_batch": batch_id}
+    if resolution:
+        changes["resolution"] = resolution
+    await db.suggestions.update_many({"id": {"$in": ids}, "status": "pending"}, {"$set": changes}, session=session)
+    claimed = await find_suggestions_by_id(ids, batch_id, session)
+    if claimed:
+        # The tag has served its purpose; keep it out of listings and exports
+        await db.suggestions.update_many(
+            {"id": {"$in": list(claimed)}, "moderation_batch": batch_id},
+            {"$unset": {"moderation_batch": ""}}, session=session
+        )
+    unclaimed = [suggestion_id for suggestion_id in ids if suggestion_id not in claimed]
+    others = await find_suggestions_by_id(unclaimed, session=session) if unclaimed else {}
+    return claimed, others
+
+async def claim_and_create_gears(ids: List[str], session=None) -> tuple:
+    """Bulk counterpart of claim_and_create_gear; return (duplicates, others, new gears by suggestion id)."""
+    claimed, others = await claim_pending_suggestions(ids, "approved", session)
+    duplicates = {suggestion_id: suggestion for suggestion_id, suggestion in claimed.items()
+                  if gear_cache.gear_ids[suggestion["gear_id"]]}
+    if duplicates:
+        await db.suggestions.update_many(
+            {"id": {"$in": list(duplicates)}, "status": "approved"},
+            {"$set": {"status": "rejected", "resolution": "duplicate"}}, session=session
+        )
+    new_gears = {suggestion_id: gear_from_suggestion(claimed[suggestion_id])
+                 for suggestion_id in ids if suggestion_id in claimed and suggestion_id not in duplicates}
+    if new_gears:
+        try:
+            await db.gears.insert_many([dict(gear) for gear in new_gears.values()], session=session)
+        except PyMongoError:
+            if session is None:
+                # Without a transaction, drop any gear that made it in and hand the suggestions back
+                await db.gears.delete_many({"id": {"$in": [gear["id"] for gear in new_gears.values()]}})
+                await db.suggestions.update_many(
+                    {"id": {"$in": list(new_gears)}, "status": "approved"},
+                    {"$set": {"status": "pending"}, "$unset": {"resolved_at": ""}}
+                )
+            raise
+    return duplicates, others, new_gears
+
+def unclaimed_result(suggestion_id: str, others: dict) -> dict:
+    suggestion = others.get(suggestion_id)
+    if suggestion is None:
+        return {"id": suggestion_id, "status": "not_found"}
+    return {"id": suggestion_id, "status": "skipped", "detail": f"Déjà {suggestion['status']}"}
+
+@app.post("/api/suggestions/bulk-approve")
+async def bulk_approve_suggestions(bulk_data: SuggestionBulkRequest, current_user: User = Depends(get_current_user)):
+    if current_user.role == "moderateur":
+        raise HTTPException(status_code=403, detail="Accès refusé")
+    ids = list(dict.fromkeys(bulk_data.ids))
+    check_batch_size(len(ids))
+
+    await gear_cache.ensure_fresh()
+    if MONGO_TRANSACTIONS:
+        async with await client.start_session() as session:
+            async with session.start_transaction():
+                duplicates, others, new_gears = await claim_and_create_gears(ids, session)
+    else:
+        duplicates, others, new_gears = await claim_and_create_gears(ids)
+    results = []
+    for suggestion_id in ids:
+        if suggestion_id in new_gears:
+            results.append({"id": suggestion_id, "status": "approved", "new_gear_id": new_gears[suggestion_id]["id"]})
+        elif suggestion_id in duplicates:
+            results.append({"id": suggestion_id, "status": "duplicate", "detail": "Gear déjà dans le catalogue"})
+        else:
+            results.append(unclaimed_result(suggestion_id, others))
+    await close_duplicate_suggestions(duplicates)
+
+    if new_gears:
+        await bump_counters("suggestions", {"pending": -len(new_gears), "approved": len(new_gears)})
+        await bump_counters("gears", Counter(gear["category"] for gear in new_gears.values()))
+        for suggestion_id, gear in new_gears.items():
+            gear_cache.put(gear)
+            pending_gear_ids.discard(gear["gear_id"])
+            moderation_feed.publish("suggestion.approved", {"id": suggestion_id, "gear": gear})
+            moderation_feed.publish("gear.created", gear)
+        await job_queue.enqueue_many(
+            [effect for gear in new_gears.values() for effect in gear_side_effects(gear)]
+            + moderation_notice(f"✅ {current_user.username} a approuvé {len(new_gears)} suggestion(s)")
+        )
+    return bulk_report(results)
+
+@app.post("/api/suggestions/bulk-reject")
+async def bulk_reject_suggestions(bulk_data: SuggestionBulkRequest, current_user: User = Depends(get_current_user)):
+    if current_user.role == "moderateur":
+        raise HTTPException(status_code=403, detail="Accès refusé")
+    ids = list(dict.fromkeys(bulk_data.ids))
+    check_batch_size(len(ids))
+
+    claimed, others = await claim_pending_suggestions(ids, "rejected")
+    await bump_counters("suggestions", {"pending": -len(claimed), "rejected": len(claimed)})
+    results = []
+    for suggestion_id in ids:
+        if suggestion_id in claimed:
+            pending_gear_ids.discard(claimed[suggestion_id]["gear_id"])
+            moderation_feed.publish("suggestion.rejected", {"id": suggestion_id})
+            results.append({"id": suggestion_id, "status": "rejected"})
+        else:
+            results.append(unclaimed_result(suggestion_id, others))
+    return bulk_report(results)
+
+# Export endpoints: documents are streamed from the Mongo cursor in batches,
+# so memory stays flat whatever the collection size
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '500'))
+EXPORT_CHUNK_BYTES = 64 * 1024
+GEAR_EXPORT_COLUMNS = ["id", "name", "nickname", "gear_id", "image_url", "description", "category"]
+SUGGESTION_EXPORT_COLUMNS = GEAR_EXPORT_COLUMNS + ["status", "created_at", "submission_count", "resolved_at"]
+
+# Spreadsheets run a cell starting with one of these as a formula; user-submitted
+# names and descriptions must come out as text (OWASP CSV injection)
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def csv_value(value):
+    value = export_value(value)
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+async def stream_export(cursor, columns: list, export_format: str):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == "csv" else None
+    if writer:
+        writer.writerow(columns)
+    async for document in cursor:
+        if writer:
+            writer.writerow([csv_value(document.get(column, "")) for column in columns])
+        else:
+            buffer.write(json.dumps(document, ensure_ascii=False, default=export_value))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def export_response(cursor, columns: list, export_format: str, name: str) -> StreamingResponse:
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{export_format}"
+    return StreamingResponse(
+        stream_export(cursor, columns, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.get("/api/export/gears")
+async def export_gears(
+    category: Optional[str] = None,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user),
+):
+    query = {}
+    if category:
+        query["category"] = category
+    cursor = db.gears.find(query, {"_id": 0}, batch_size=EXPORT_BATCH_SIZE).sort("id", ASCENDING)
+    return export_response(cursor, GEAR_EXPORT_COLUMNS, export_format, "gears")
+
+@app.get("/api/export/suggestions")
+async def export_suggestions(
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    archived: bool = False,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    current_user: User = Depends(get_current_user),
+):
+    query = {}
+    if status:
+        query["status"] = status
+    if category:
+        query["category"] = category
+    if created_from or created_to:
+        query["created_at"] = {}
+        if created_from:
+            query["created_at"]["$gte"] = created_from
+        if created_to:
+            query["created_at"]["$lt"] = created_to
+    collection = db.suggestions_archive if archived else db.suggestions
+    cursor = collection.find(query, {"_id": 0}, batch_size=EXPORT_BATCH_SIZE).sort("created_at", ASCENDING)
+    return export_response(cursor, SUGGESTION_EXPORT_COLUMNS, export_format,
+                           "suggestions_archive" if archived else "suggestions")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # Several workers need an import string; production should prefer gunicorn -c gunicorn.conf.py
+    if WEB_CONCURRENCY > 1:
+        uvicorn.run("server:app", host="0.0.0.0", port=8001, workers=WEB_CONCURRENCY,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Backend Load Benchmark for Center French Gear Suggestions
+Starts the app in-process against a local Mongo stand-in (or targets a running
+backend), seeds data at a configurable scale, drives concurrent workloads and
+reports throughput and latency percentiles per endpoint as JSON
+"""
+
+import asyncio
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+CATEGORIES = ["joueurs", "moderateur", "evenements", "interdits"]
+WORDS = ["épée", "bâton", "bouclier", "cape", "couronne", "lance", "arme", "outil", "lumière",
+         "fête", "modo", "événement", "dragon", "glace", "feu", "ombre", "étoile", "marteau"]
+# Where fake gears point their images; the in-process run swaps in a local stub origin
+IMAGE_ORIGIN = "https://tr.rbxcdn.com"
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies, statuses, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(1 for status_code in statuses if status_code is None or status_code >= 500),
+        # 429s come from the server's rate limiter; the in-process mode lifts the limits
+        "throttled": sum(1 for status_code in statuses if status_code == 429),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+def fake_gear(index):
+    words = random.sample(WORDS, 3)
+    return {
+        "name": f"{words[0].title()} {words[1].title()} {index}",
+        "nickname": f"{words[2].title()} {index}",
+        "gear_id": f"{100000000 + index}",
+        "image_url": f"{IMAGE_ORIGIN}/{uuid.uuid4().hex}/420/420/Hat/Png",
+        "description": " ".join(random.choices(WORDS, k=8)),
+        "category": random.choice(CATEGORIES),
+    }
+
+class StubImageOrigin:
+    """Local stand-in for the Roblox CDN: the same PNG at every path"""
+    def __init__(self):
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new("RGBA", (420, 420), (200, 40, 40, 255)).save(buffer, "PNG")
+        self.png = buffer.getvalue()
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(origin.png)))
+                self.end_headers()
+                self.wfile.write(origin.png)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.host = f"127.0.0.1:{self.server.server_port}"
+        self.url = f"http://{self.host}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+async def start_in_process_app(mongo_url=None, gears=1000, suggestions=200, bcrypt_rounds=None):
+    """Import the backend, point it at a fresh database, seed it and return an ASGI client"""
+    global IMAGE_ORIGIN
+    # Benchmarks measure the server, not the abuse limits
+    os.environ.setdefault("RATE_LIMIT_LOGIN_IP", "1000000/1")
+    os.environ.setdefault("RATE_LIMIT_LOGIN_USERNAME", "1000000/1")
+    os.environ.setdefault("RATE_LIMIT_SUGGESTIONS_IP", "1000000/1")
+    os.environ.setdefault("MONGO_INDEX_CHECK", "false")
+    # Keep benchmark snapshots out of the source tree
+    os.environ.setdefault("SNAPSHOT_DIR", tempfile.mkdtemp(prefix="center_french_snapshots_"))
+    # Thumbnails are fetched from a local origin so runs need no network
+    image_origin = StubImageOrigin()
+    IMAGE_ORIGIN = image_origin.url
+    os.environ["IMAGE_ALLOWED_HOSTS"] = image_origin.host
+    os.environ.setdefault("IMAGE_CACHE_DIR", tempfile.mkdtemp(prefix="center_french_images_"))
+    if bcrypt_rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(bcrypt_rounds)
+    sys.path.insert(0, BACKEND_DIR)
+    import server
+
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        server.client = AsyncIOMotorClient(mongo_url)
+        await server.client.drop_database("center_french_benchmark")
+        server.db = server.client.center_french_benchmark
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        server.client = AsyncMongoMockClient()
+        server.db = server.client.center_french_benchmark
+
+    await server.startup_event()
+    await server.lifecycle.wait_ready()
+    if gears:
+        await server.db.gears.insert_many([{"id": str(uuid.uuid4()), **fake_gear(i)} for i in range(gears)])
+    if suggestions:
+        now = time.time()
+        await server.db.suggestions.insert_many([
+            {"id": str(uuid.uuid4()), **fake_gear(gears + i), "status": "pending",
+             "created_at": server.datetime.utcfromtimestamp(now - i), "submission_count": 1}
+            for i in range(suggestions)
+        ])
+    await server.gear_cache.load()
+    await server.load_pending_gear_ids()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://benchmark")
+    return client
+
+class CenterFrenchBenchmark:
+    def __init__(self, client, concurrency=50, requests_per_scenario=1000,
+                 username="admin", password="Mouse123890!"):
+        self.client = client
+        self.concurrency = concurrency
+        self.requests_per_scenario = requests_per_scenario
+        self.username = username
+        self.password = password
+        self.headers = None
+        self.gear_ids = []
+        self.image_urls = []
+        self.results = {}
+
+    async def timed_request(self, method, endpoint, data=None, headers=None):
+        """Make one HTTP request and return (status_code, latency_seconds)"""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"/{endpoint}", json=data, headers=headers, timeout=30)
+            status_code = response.status_code
+        except httpx.HTTPError:
+            status_code = None
+        return status_code, time.perf_counter() - start
+
+    async def drive(self, total, make_request):
+        """Run total requests over self.concurrency workers; make_request(i) returns (name, method, endpoint, data, headers)"""
+        per_endpoint = {}
+        counter = iter(range(total))
+
+        async def worker():
+            for i in counter:
+                name, method, endpoint, data, headers = make_request(i)
+                status_code, latency = await self.timed_request(method, endpoint, data, headers)
+                latencies, statuses = per_endpoint.setdefault(name, ([], []))
+                latencies.append(latency)
+                statuses.append(status_code)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - start
+        return {name: summarize(latencies, statuses, elapsed)
+                for name, (latencies, statuses) in per_endpoint.items()}
+
+    def record(self, scenario, stats):
+        self.results[scenario] = stats
+        for name, endpoint_stats in stats.items():
+            print(f"📈 {scenario} / {name}: {endpoint_stats['throughput_rps']} req/s, "
+                  f"p50 {endpoint_stats['p50_ms']}ms, p99 {endpoint_stats['p99_ms']}ms, "
+                  f"{endpoint_stats['errors']} errors, {endpoint_stats['throttled']} throttled")
+
+    async def login(self):
+        response = await self.client.post("/api/auth/login", json={"username": self.username, "password": self.password})
+        if response.status_code != 200:
+            return None
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def setup(self):
+        self.headers = await self.login()
+        gears = (await self.client.get("/api/gears")).json()
+        self.gear_ids = [gear["id"] for gear in gears]
+        self.image_urls = [gear["image_url"] for gear in gears]
+
+    async def bench_catalog(self):
+        """Concurrent catalog browsing: full list, per category and single gear"""
+        print("\n⚙️ Benchmarking catalog reads...")
+        self.record("catalog browse", await self.drive(
+            self.requests_per_scenario, lambda i: ("GET /api/gears", 'GET', 'api/gears', None, None)))
+        self.record("category filter", await self.drive(
+            self.requests_per_scenario,
+            lambda i: ("GET /api/gears?category", 'GET', f"api/gears?category={CATEGORIES[i % 4]}", None, None)))
+        if self.gear_ids:
+            self.record("single gear", await self.drive(
+                self.requests_per_scenario,
+                lambda i: ("GET /api/gears/{id}", 'GET', f"api/gears/{random.choice(self.gear_ids)}", None, None)))
+
+    async def bench_images(self):
+        """Grid thumbnails through the image proxy: the first request per image misses, the rest hit the disk cache"""
+        print("\n🖼️ Benchmarking image thumbnails...")
+        if not self.image_urls:
+            return
+        urls = self.image_urls[:100]
+        self.record("thumbnails", await self.drive(
+            self.requests_per_scenario,
+            lambda i: ("GET /api/images", 'GET', f"api/images?{urlencode({'url': urls[i % len(urls)], 'size': 256})}", None, None)))
+
+    async def bench_search(self):
+        """Concurrent typeahead queries: accent-insensitive prefix and a typo"""
+        print("\n🔎 Benchmarking search...")
+        queries = ["ep", "bat", "bouclir", "couronne", "lumi"]
+        self.record("search", await self.drive(
+            self.requests_per_scenario,
+            lambda i: ("GET /api/gears/search", 'GET', f"api/gears/search?q={queries[i % len(queries)]}&fields=name,nickname", None, None)))
+
+    async def bench_login(self):
+        """Login storm alone, then catalog reads while a storm is running"""
+        print("\n🔐 Benchmarking logins...")
+        credentials = {"username": self.username, "password": self.password}
+        # bcrypt is deliberately slow, so the login storm uses a tenth of the request budget
+        total = max(self.concurrency, self.requests_per_scenario // 10)
+        login = lambda i: ("POST /api/auth/login", 'POST', 'api/auth/login', credentials, None)
+        self.record("login storm", await self.drive(total, login))
+
+        # Catalog latency during a storm shows whether bcrypt blocks the event loop
+        storm = asyncio.ensure_future(self.drive(total, login))
+        self.record("catalog during login storm", await self.drive(
+            self.requests_per_scenario, lambda i: ("GET /api/gears", 'GET', 'api/gears', None, None)))
+        await storm
+
+    async def bench_suggestions(self):
+        """Flood of public submissions, then moderators approving and rejecting"""
+        print("\n💡 Benchmarking suggestion flood and moderation...")
+        run_id = uuid.uuid4().hex[:6]
+        self.record("suggestion flood", await self.drive(
+            self.requests_per_scenario,
+            lambda i: ("POST /api/suggestions", 'POST', 'api/suggestions',
+                       {**fake_gear(i), "gear_id": f"FLOOD{run_id}{i}"}, None)))
+        if self.headers is None:
+            return
+        pending = (await self.client.get("/api/suggestions?status=pending&limit=200&fields=id",
+                                         headers=self.headers)).json()["items"]
+        ids = [suggestion["id"] for suggestion in pending]
+        if ids:
+            self.record("moderation", await self.drive(
+                len(ids),
+                lambda i: ("POST /api/suggestions/{id}/" + ("approve" if i % 2 else "reject"), 'POST',
+                           f"api/suggestions/{ids[i]}/{'approve' if i % 2 else 'reject'}", None, self.headers)))
+        self.record("moderation listing", await self.drive(
+            self.requests_per_scenario // 10 or 1,
+            lambda i: ("GET /api/suggestions?limit", 'GET', 'api/suggestions?status=pending&limit=50', None, self.headers)))
+
+    async def bench_mixed(self):
+        """Mixed traffic shaped like production: mostly reads, some writes and logins"""
+        print("\n🔀 Benchmarking mixed workload...")
+        credentials = {"username": self.username, "password": self.password}
+        run_id = uuid.uuid4().hex[:6]
+        mix = [
+            (50, lambda i: ("GET /api/gears?category", 'GET', f"api/gears?category={CATEGORIES[i % 4]}", None, None)),
+            (20, lambda i: ("GET /api/gears", 'GET', 'api/gears', None, None)),
+            (15, lambda i: ("GET /api/gears/{id}", 'GET', f"api/gears/{random.choice(self.gear_ids)}", None, None)),
+            (8, lambda i: ("GET /api/gears/search", 'GET', 'api/gears/search?q=ep', None, None)),
+            (4, lambda i: ("POST /api/suggestions", 'POST', 'api/suggestions',
+                           {**fake_gear(i), "gear_id": f"MIX{run_id}{i}"}, None)),
+            (2, lambda i: ("GET /api/suggestions?limit", 'GET', 'api/suggestions?limit=50', None, self.headers)),
+            (1, lambda i: ("POST /api/auth/login", 'POST', 'api/auth/login', credentials, None)),
+        ]
+        weights = [weight for weight, _ in mix]
+        choices = [make for _, make in mix]
+        self.record("mixed", await self.drive(
+            self.requests_per_scenario, lambda i: random.choices(choices, weights)[0](i)))
+
+    async def check_approval_race(self, racers=20):
+        """Fire parallel approve/reject calls at one suggestion: exactly one may win"""
+        print("\n🏁 Checking concurrent approve/reject on one suggestion...")
+        if self.headers is None:
+            print("❌ Approval race - login failed, skipped")
+            return False
+        gear_id = f"RACE{uuid.uuid4().hex[:8]}"
+        await self.client.post("/api/suggestions", json={**fake_gear(0), "gear_id": gear_id})
+        pending = (await self.client.get("/api/suggestions?status=pending", headers=self.headers)).json()
+        suggestion = next((s for s in pending if s["gear_id"] == gear_id), None)
+        if suggestion is None:
+            print("❌ Approval race - suggestion was not created")
+            return False
+
+        actions = ['approve' if i % 2 else 'reject' for i in range(racers)]
+        outcomes = await asyncio.gather(*(
+            self.timed_request('POST', f"api/suggestions/{suggestion['id']}/{action}", headers=self.headers)
+            for action in actions
+        ))
+        codes = [status_code for status_code, _ in outcomes]
+        gears = (await self.client.get("/api/gears")).json()
+        created = sum(1 for gear in gears if gear["gear_id"] == gear_id)
+        winners = codes.count(200)
+        # An approval must leave exactly one gear behind, a rejection none
+        expected = 1 if winners == 1 and actions[codes.index(200)] == 'approve' else 0
+        passed = winners == 1 and created == expected and all(code in (200, 409) for code in codes)
+        self.results["approval race"] = {"racers": racers, "winners": winners, "gears_created": created,
+                                         "winner": actions[codes.index(200)] if winners else None,
+                                         "passed": passed}
+        print(f"{'✅' if passed else '❌'} Approval race - {winners} winner(s), {created} gear(s) created")
+        return passed
+
+    async def run_all(self):
+        """Run every benchmark scenario"""
+        print("🚀 Starting Center French API Benchmark")
+        print(f"Concurrency {self.concurrency}, {self.requests_per_scenario} requests per scenario")
+        print("=" * 60)
+
+        await self.setup()
+        await self.bench_catalog()
+        await self.bench_search()
+        await self.bench_images()
+        await self.bench_login()
+        await self.bench_suggestions()
+        await self.bench_mixed()
+        await self.check_approval_race()
+
+        print("\n" + "=" * 60)
+        return self.results
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(report, baseline):
+    """Print throughput and p99 changes per endpoint against an earlier report"""
+    print(f"\n📊 Compared with {baseline.get('commit') or 'baseline'}:")
+    for scenario, stats in report["scenarios"].items():
+        for name, endpoint_stats in stats.items():
+            before = baseline.get("scenarios", {}).get(scenario, {}).get(name)
+            if not isinstance(endpoint_stats, dict) or not isinstance(before, dict) or "p99_ms" not in before:
+                continue
+            rps_change = (endpoint_stats["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0
+            print(f"  {scenario} / {name}: {rps_change:+.1f}% req/s, "
+                  f"p99 {before['p99_ms']}ms -> {endpoint_stats['p99_ms']}ms")
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server_processes(workers, port, mongo_url):
+    """Start the backend with gunicorn (or uvicorn --workers when gunicorn is missing) on a benchmark database"""
+    env = dict(os.environ, MONGO_URL=mongo_url, MONGO_DB_NAME="center_french_benchmark",
+               WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}", MONGO_INDEX_CHECK="false",
+               SNAPSHOT_DIR=tempfile.mkdtemp(prefix="center_french_snapshots_"),
+               IMAGE_CACHE_DIR=tempfile.mkdtemp(prefix="center_french_images_"))
+    if shutil.which("gunicorn"):
+        command = ["gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "server:app"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+                   "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env)
+
+async def wait_until_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/gears?limit=1")).status_code == 200:
+                    return True
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    return False
+
+def load_client(base_url, duration, concurrency, gear_ids, results):
+    """One load-generating process: catalog reads for `duration` seconds, reporting latencies"""
+    async def main():
+        latencies, errors = [], 0
+        deadline = time.monotonic() + duration
+        async with httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_connections=concurrency)) as client:
+            async def worker():
+                nonlocal errors
+                while time.monotonic() < deadline:
+                    roll = random.random()
+                    if roll < 0.4:
+                        endpoint = f"/api/gears?category={random.choice(CATEGORIES)}"
+                    elif roll < 0.8:
+                        endpoint = f"/api/gears/{random.choice(gear_ids)}"
+                    else:
+                        endpoint = f"/api/gears/search?q={random.choice(WORDS)[:3]}"
+                    start = time.perf_counter()
+                    try:
+                        ok = (await client.get(endpoint)).status_code == 200
+                    except httpx.HTTPError:
+                        ok = False
+                    latencies.append(time.perf_counter() - start)
+                    errors += not ok
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors
+    results.put(asyncio.run(main()))
+
+async def run_scaling(args):
+    """Catalog read throughput with 1..N worker processes against the same mongod"""
+    if not args.mongo_url:
+        raise SystemExit("--scale needs --mongo-url: worker processes cannot share mongomock")
+    from motor.motor_asyncio import AsyncIOMotorClient
+    mongo = AsyncIOMotorClient(args.mongo_url)
+    await mongo.drop_database("center_french_benchmark")
+    await mongo.center_french_benchmark.gears.insert_many(
+        [{"id": str(uuid.uuid4()), **fake_gear(i)} for i in range(args.gears)])
+    mongo.close()
+
+    context = multiprocessing.get_context("spawn")
+    scaling = {}
+    for workers in [int(count) for count in args.scale.split(",")]:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server_processes(workers, port, args.mongo_url)
+        try:
+            if not await wait_until_ready(base_url):
+                raise SystemExit(f"backend with {workers} worker(s) did not start")
+            async with httpx.AsyncClient(base_url=base_url) as client:
+                gear_ids = [gear["id"] for gear in (await client.get("/api/gears")).json()]
+            # Load comes from several processes so the client side is not the bottleneck
+            results = context.Queue()
+            clients = [context.Process(target=load_client,
+                                       args=(base_url, args.duration, args.concurrency, gear_ids, results))
+                       for _ in range(args.client_processes)]
+            for process in clients:
+                process.start()
+            outcomes = [results.get() for _ in clients]
+            for process in clients:
+                process.join()
+        finally:
+            server.terminate()
+            server.wait()
+        latencies = sorted(latency for process_latencies, _ in outcomes for latency in process_latencies)
+        errors = sum(process_errors for _, process_errors in outcomes)
+        stats = summarize(latencies, [200] * (len(latencies) - errors) + [None] * errors, args.duration)
+        scaling[workers] = stats
+        print(f"📈 {workers} worker(s): {stats['throughput_rps']} req/s, p50 {stats['p50_ms']}ms, "
+              f"p99 {stats['p99_ms']}ms, {stats['errors']} errors")
+
+    baseline = scaling[min(scaling)]["throughput_rps"] / min(scaling)
+    for workers, stats in scaling.items():
+        # 1.0 means perfectly linear: N workers serve N times the single-worker throughput
+        stats["scaling_efficiency"] = round(stats["throughput_rps"] / (baseline * workers), 3) if baseline else 0.0
+    return {
+        "commit": current_commit(),
+        "mode": "scaling",
+        "cpu_count": os.cpu_count(),
+        "seed": {"gears": args.gears, "random_seed": args.seed},
+        "client_processes": args.client_processes,
+        "concurrency_per_client": args.concurrency,
+        "duration_seconds": args.duration,
+        "scenarios": {"catalog reads by workers": {f"{workers} workers": stats for workers, stats in scaling.items()}},
+    }
+
+async def run(args):
+    random.seed(args.seed)
+    if args.scale:
+        return await run_scaling(args)
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+        mode = "remote"
+    else:
+        client = await start_in_process_app(args.mongo_url, args.gears, args.suggestions, args.bcrypt_rounds)
+        mode = "mongod" if args.mongo_url else "mongomock"
+    async with client:
+        benchmark = CenterFrenchBenchmark(client, args.concurrency, args.requests, args.username, args.password)
+        scenarios = await benchmark.run_all()
+    return {
+        "commit": current_commit(),
+        "mode": mode,
+        "seed": {"gears": args.gears, "suggestions": args.suggestions, "random_seed": args.seed},
+        "concurrency": args.concurrency,
+        "requests_per_scenario": args.requests,
+        "scenarios": scenarios,
+    }
+
+def main():
+    """Main benchmark execution"""
+    parser = argparse.ArgumentParser(description="Center French backend load benchmark")
+    parser.add_argument("--base-url", help="Benchmark a running backend instead of starting one in-process")
+    parser.add_argument("--mongo-url", help="Use this mongod for the in-process app (default: mongomock)")
+    parser.add_argument("--gears", type=int, default=1000, help="Gears to seed in-process")
+    parser.add_argument("--suggestions", type=int, default=200, help="Pending suggestions to seed in-process")
+    parser.add_argument("--bcrypt-rounds", type=int, help="Override BCRYPT_ROUNDS for the in-process app")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="Mouse123890!")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    parser.add_argument("--scale", help="Comma-separated worker counts (e.g. 1,2,4) for the multi-process scaling run")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds of load per worker count in --scale")
+    parser.add_argument("--client-processes", type=int, default=max(2, (os.cpu_count() or 2) // 2),
+                        help="Load-generating processes in --scale")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if args.scale:
+        return 0
+    return 0 if report["scenarios"].get("approval race", {}).get("passed", True) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ Tests all API endpoints with proper authentication and error handling
 """
 
 import requests
+import os
 import sys
 import json
 from datetime import datetime
@@ -219,7 +220,9 @@ class CenterFrenchAPITester:
 
 def main():
     """Main test execution"""
-    tester = CenterFrenchAPITester()
+    # BACKEND_URL points the suite at a local server; see backend_benchmark.py for load testing
+    base_url = os.environ.get("BACKEND_URL")
+    tester = CenterFrenchAPITester(base_url) if base_url else CenterFrenchAPITester()
     success = tester.run_all_tests()
     return 0 if success else 1
 
@@ -0,0 +1,64 @@
+import contextlib
+import importlib.util
+import itertools
+import os
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+SERVER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "server.py")
+ADMIN_CREDENTIALS = {"username": "admin", "password": "Mouse123890!"}
+
+_loaded = itertools.count()
+
+
+@pytest.fixture
+def load_server(tmp_path, monkeypatch):
+    """Import a fresh copy of backend/server.py on an in-memory database.
+
+    server.py reads its settings at import time, so extra environment variables
+    are passed here rather than set after the fact.
+    """
+    def load(**env):
+        settings = {
+            "SNAPSHOT_DIR": str(tmp_path / "snapshots"),
+            "IMAGE_CACHE_DIR": str(tmp_path / "images"),
+            "BCRYPT_ROUNDS": "4",
+            "MONGO_INDEX_CHECK": "false",
+            "IMAGE_ALLOWED_HOSTS": "images.test",
+        }
+        settings.update(env)
+        for key, value in settings.items():
+            monkeypatch.setenv(key, value)
+        spec = importlib.util.spec_from_file_location(f"server_{next(_loaded)}", SERVER_PATH)
+        server = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(server)
+        server.client = AsyncMongoMockClient()
+        server.db = server.client.center_french
+        return server
+    return load
+
+
+@pytest.fixture
+def server(load_server):
+    return load_server()
+
+
+@contextlib.asynccontextmanager
+async def running(server):
+    """Start the app as its lifespan does and yield an HTTP client bound to it."""
+    await server.startup_event()
+    await server.lifecycle.wait_ready()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            yield client
+    finally:
+        await server.shutdown_event()
+
+
+async def admin_headers(client) -> dict:
+    response = await client.post("/api/auth/login", json=ADMIN_CREDENTIALS)
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
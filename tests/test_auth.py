@@ -0,0 +1,64 @@
+import asyncio
+import time
+import types
+
+import jwt
+import pytest
+
+
+@pytest.fixture
+def clock(server, monkeypatch):
+    """Pin server.py's wall clock; starts a fifth into the current second."""
+    now = [int(time.time()) + 0.2]
+    monkeypatch.setattr(server, "time", types.SimpleNamespace(time=lambda: now[0], perf_counter=time.perf_counter))
+    server.lifecycle.revocations_loaded = True
+    return now
+
+
+def rejected(server, token: str) -> bool:
+    try:
+        server.verify_token(token)
+    except server.HTTPException as e:
+        assert e.status_code == 401
+        return True
+    return False
+
+
+def test_revocation_covers_tokens_from_its_own_second(server, clock):
+    earlier = server.create_access_token("admin", "admin")
+    clock[0] += 0.5
+    asyncio.run(server.revoke_user_tokens("admin"))
+    clock[0] += 0.001
+    later = server.create_access_token("admin", "admin")
+
+    assert rejected(server, earlier)
+    assert not rejected(server, later)
+
+
+def test_revocation_is_persisted_in_milliseconds(server, clock):
+    async def scenario():
+        await server.db.users.insert_one({"username": "admin", "tokens_revoked_before": 12})
+        await server.revoke_user_tokens("admin")
+        return await server.db.users.find_one({"username": "admin"}, {"_id": 0})
+
+    stored = asyncio.run(scenario())
+
+    assert stored == {"username": "admin", "tokens_revoked_before_ms": int(clock[0] * 1000)}
+
+
+def test_legacy_cutoffs_and_tokens_compare_by_second(server, clock):
+    second = int(clock[0])
+    legacy = jwt.encode({"username": "admin", "role": "admin", "iat": second - 1, "exp": second + 3600},
+                        server.SECRET_KEY, algorithm="HS256")
+    same_second = jwt.encode({"username": "admin", "role": "admin", "iat": second, "exp": second + 3600},
+                             server.SECRET_KEY, algorithm="HS256")
+
+    async def scenario():
+        await server.db.users.insert_one({"username": "admin", "tokens_revoked_before": second})
+        await server.load_revocations()
+
+    asyncio.run(scenario())
+
+    assert server.tokens_revoked_before["admin"] == second * 1000
+    assert rejected(server, legacy)
+    assert not rejected(server, same_second)
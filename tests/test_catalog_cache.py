@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+
+def gear(number: int, name: str) -> dict:
+    return {"id": f"{number:06d}", "name": name, "nickname": "", "description": "",
+            "gear_id": str(number), "category": "joueurs", "image_url": ""}
+
+
+def during_read(server, monkeypatch, write):
+    """Run `write` once the catalog read has returned, before load() swaps the result in."""
+    cursor_class = type(server.db.gears.find({}))
+    to_list = cursor_class.to_list
+
+    async def to_list_then_write(self, *args, **kwargs):
+        documents = await to_list(self, *args, **kwargs)
+        write()
+        return documents
+
+    monkeypatch.setattr(cursor_class, "to_list", to_list_then_write)
+
+
+async def load(server):
+    async with server.gear_cache.lock:
+        await server.gear_cache.load()
+
+
+@pytest.mark.parametrize("reload", [False, True])
+def test_put_during_load_is_kept(server, monkeypatch, reload):
+    cache = server.gear_cache
+    added = gear(2, "Lumiere")
+
+    async def scenario():
+        await server.db.gears.insert_one(gear(1, "Epee"))
+        if reload:
+            await load(server)
+        during_read(server, monkeypatch, lambda: cache.put(added))
+        await load(server)
+
+    asyncio.run(scenario())
+
+    assert cache.by_id[added["id"]] == added
+    assert added["id"] in cache.by_category["joueurs"]
+    assert cache.gear_ids[added["gear_id"]] == 1
+    assert cache.search_index.search("lumiere", 10) == [added["id"]]
+
+
+@pytest.mark.parametrize("reload", [False, True])
+def test_remove_during_load_is_kept(server, monkeypatch, reload):
+    cache = server.gear_cache
+    removed = gear(1, "Epee")
+
+    async def scenario():
+        await server.db.gears.insert_many([removed, gear(2, "Lumiere")])
+        if reload:
+            await load(server)
+        during_read(server, monkeypatch, lambda: cache.remove(removed["id"]))
+        await load(server)
+
+    asyncio.run(scenario())
+
+    assert removed["id"] not in cache.by_id
+    assert removed["id"] not in cache.by_category["joueurs"]
+    assert removed["gear_id"] not in cache.gear_ids
+    assert cache.search_index.search("epee", 10) == []
+    assert cache.write_log is None
@@ -0,0 +1,38 @@
+import asyncio
+import csv
+import io
+import json
+
+from .conftest import admin_headers, running
+
+FORMULAS = ["=HYPERLINK(\"http://evil.test\")", "+1+1", "-2+3", "@SUM(A1:A2)", "\tcmd", "\rcmd"]
+
+
+def gear(number: int, name: str) -> dict:
+    return {"id": f"{number:06d}", "name": name, "nickname": "nick", "gear_id": str(number),
+            "image_url": "https://tr.rbxcdn.com/hat", "description": "Une epee", "category": "joueurs"}
+
+
+def export(server, export_format: str) -> str:
+    async def scenario():
+        await server.db.gears.insert_many([gear(number, name) for number, name in enumerate(FORMULAS + ["Epee"])])
+        async with running(server) as client:
+            headers = await admin_headers(client)
+            response = await client.get(f"/api/export/gears?format={export_format}", headers=headers)
+            assert response.status_code == 200, response.text
+            return response.text
+
+    return asyncio.run(scenario())
+
+
+def test_csv_export_neutralizes_formulas(server):
+    rows = list(csv.DictReader(io.StringIO(export(server, "csv"), newline="")))
+
+    assert [row["name"] for row in rows] == ["'" + name for name in FORMULAS] + ["Epee"]
+    assert rows[0]["gear_id"] == "0"
+
+
+def test_ndjson_export_keeps_values_verbatim(server):
+    names = [json.loads(line)["name"] for line in export(server, "ndjson").splitlines()]
+
+    assert names == FORMULAS + ["Epee"]
@@ -0,0 +1,105 @@
+import asyncio
+import struct
+import zlib
+from collections import Counter
+
+import httpx
+
+from .conftest import running
+
+
+def png(width: int = 4, height: int = 4) -> bytes:
+    """A tiny opaque RGBA PNG, built by hand so the tests need no imaging library."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    rows = b"".join(b"\x00" + b"\xc8\x28\x28\xff" * width for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows))
+            + chunk(b"IEND", b""))
+
+
+class StubOrigin:
+    """Serves a PNG at every path except /missing/..., slowly enough for requests to overlap."""
+    def __init__(self):
+        self.hits = Counter()
+        self.image = png()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.hits[request.url.path] += 1
+        await asyncio.sleep(0.05)
+        if request.url.path.startswith("/missing/"):
+            return httpx.Response(404)
+        return httpx.Response(200, content=self.image, headers={"Content-Type": "image/png"})
+
+
+def with_origin(server) -> StubOrigin:
+    origin = StubOrigin()
+    server.image_cache.http = httpx.AsyncClient(transport=httpx.MockTransport(origin))
+    return origin
+
+
+def test_concurrent_misses_fetch_the_origin_once(server):
+    origin = with_origin(server)
+    url = "https://images.test/hat/420/420/Hat/Png"
+
+    async def scenario():
+        async with running(server) as client:
+            return await asyncio.gather(*(
+                client.get("/api/images", params={"url": url, "size": size})
+                for size in server.IMAGE_SIZES * 7))
+
+    responses = asyncio.run(scenario())
+
+    assert [r.status_code for r in responses] == [200] * len(responses)
+    assert origin.hits["/hat/420/420/Hat/Png"] == 1
+
+
+def test_failures_are_not_refetched(server):
+    origin = with_origin(server)
+    url = "https://images.test/missing/hat"
+
+    async def scenario():
+        async with running(server) as client:
+            return [(await client.get("/api/images", params={"url": url})).status_code for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [404] * 3
+    assert origin.hits["/missing/hat"] == 1
+
+
+def test_failure_memo_is_capped(load_server):
+    server = load_server(IMAGE_FAILURE_MAX_ENTRIES="3")
+    for number in range(10):
+        server.image_cache.record_failure(f"https://images.test/missing/{number}")
+
+    assert list(server.image_cache.failures) == [f"https://images.test/missing/{number}" for number in (7, 8, 9)]
+
+
+def test_least_recently_served_variants_are_evicted_by_bytes(server, tmp_path):
+    cache = server.ImageCache(str(tmp_path / "lru"), max_bytes=250)
+
+    def store(name: str):
+        cache.store(f"https://images.test/{name}", {64: (name.encode() * 100, "image/webp")})
+
+    store("a")
+    store("b")
+    assert cache.lookup("https://images.test/a", 64) is not None  # a is now the most recent
+    store("c")
+
+    assert cache.total_bytes == 200
+    assert cache.lookup("https://images.test/b", 64) is None
+    assert cache.lookup("https://images.test/a", 64) is not None
+    assert cache.lookup("https://images.test/c", 64) is not None
+
+
+def test_hosts_off_the_allowlist_are_refused(server):
+    origin = with_origin(server)
+    urls = ["https://evil.test/hat", "https://images.test.evil.test/hat", "ftp://images.test/hat",
+            "http://169.254.169.254/latest/meta-data"]
+
+    async def scenario():
+        async with running(server) as client:
+            return [(await client.get("/api/images", params={"url": url})).status_code for url in urls]
+
+    assert asyncio.run(scenario()) == [400] * len(urls)
+    assert not origin.hits
+    assert server.image_url_allowed("https://cdn.images.test/hat")
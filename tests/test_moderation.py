@@ -0,0 +1,133 @@
+import asyncio
+import functools
+
+from .conftest import admin_headers, running
+
+YIELDING_METHODS = ("find_one", "find_one_and_update", "insert_one", "update_one", "update_many",
+                    "delete_one", "count_documents")
+
+
+def yield_around_db_calls(server, monkeypatch):
+    """Suspend before and after every collection call, as a real driver does on the network.
+
+    mongomock answers without ever yielding to the event loop, which would run
+    concurrent handlers one after another and hide check-then-act races.
+    """
+    collection_class = type(server.db.suggestions)
+    for name in YIELDING_METHODS:
+        method = getattr(collection_class, name)
+
+        @functools.wraps(method)
+        async def yielding(self, *args, _method=method, **kwargs):
+            await asyncio.sleep(0)
+            result = await _method(self, *args, **kwargs)
+            await asyncio.sleep(0)
+            return result
+
+        monkeypatch.setattr(collection_class, name, yielding)
+
+
+def suggestion(gear_id: str) -> dict:
+    return {"name": "Epee Lumiere", "nickname": "epee", "description": "Une epee",
+            "gear_id": gear_id, "category": "joueurs", "image_url": "https://tr.rbxcdn.com/epee"}
+
+
+def test_concurrent_approve_and_reject_have_one_winner(server, monkeypatch):
+    async def scenario():
+        async with running(server) as client:
+            headers = await admin_headers(client)
+            response = await client.post("/api/suggestions", json=suggestion("424242"))
+            assert response.status_code == 200, response.text
+            pending = (await client.get("/api/suggestions?status=pending", headers=headers)).json()
+            suggestion_id = next(item["id"] for item in pending if item["gear_id"] == "424242")
+
+            yield_around_db_calls(server, monkeypatch)
+            actions = ["reject" if i % 2 else "approve" for i in range(20)]
+            responses = await asyncio.gather(*(
+                client.post(f"/api/suggestions/{suggestion_id}/{action}", headers=headers)
+                for action in actions
+            ))
+            created = await server.db.gears.count_documents({"gear_id": "424242"})
+            stored = await server.db.suggestions.find_one({"id": suggestion_id})
+            return actions, [r.status_code for r in responses], created, stored["status"]
+
+    actions, codes, created, status = asyncio.run(scenario())
+
+    assert codes.count(200) == 1, codes
+    assert set(codes) == {200, 409}, codes
+    winner = actions[codes.index(200)]
+    assert status == ("approved" if winner == "approve" else "rejected")
+    assert created == (1 if winner == "approve" else 0)
+
+
+def catalog_gear(gear_id: str) -> dict:
+    return {"id": f"gear-{gear_id}", **suggestion(gear_id)}
+
+
+async def submit(client, headers, gear_id: str) -> str:
+    response = await client.post("/api/suggestions", json=suggestion(gear_id))
+    assert response.status_code == 200, response.text
+    pending = (await client.get("/api/suggestions?status=pending", headers=headers)).json()
+    return next(item["id"] for item in pending if item["gear_id"] == gear_id)
+
+
+async def add_behind_the_api(server, gear_id: str):
+    """A gear that reached the catalog without resolving the suggestions for it."""
+    gear = catalog_gear(gear_id)
+    await server.db.gears.insert_one(dict(gear))
+    server.gear_cache.put(gear)
+
+
+def test_approving_a_gear_already_in_the_catalog_closes_the_suggestion(server):
+    async def scenario():
+        async with running(server) as client:
+            headers = await admin_headers(client)
+            suggestion_id = await submit(client, headers, "515151")
+            await add_behind_the_api(server, "515151")
+            response = await client.post(f"/api/suggestions/{suggestion_id}/approve", headers=headers)
+            stored = await server.db.suggestions.find_one({"id": suggestion_id})
+            created = await server.db.gears.count_documents({"gear_id": "515151"})
+            return response.status_code, stored, created
+
+    code, stored, created = asyncio.run(scenario())
+
+    assert code == 409
+    assert (stored["status"], stored["resolution"]) == ("rejected", "duplicate")
+    assert created == 1
+
+
+def test_bulk_approve_skips_gears_already_in_the_catalog(server):
+    async def scenario():
+        async with running(server) as client:
+            headers = await admin_headers(client)
+            duplicate_id = await submit(client, headers, "616161")
+            fresh_id = await submit(client, headers, "717171")
+            await add_behind_the_api(server, "616161")
+            response = await client.post("/api/suggestions/bulk-approve", headers=headers,
+                                         json={"ids": [duplicate_id, fresh_id]})
+            counts = {gear_id: await server.db.gears.count_documents({"gear_id": gear_id})
+                      for gear_id in ("616161", "717171")}
+            return response.json(), duplicate_id, fresh_id, counts
+
+    report, duplicate_id, fresh_id, counts = asyncio.run(scenario())
+
+    statuses = {result["id"]: result["status"] for result in report["results"]}
+    assert statuses == {duplicate_id: "duplicate", fresh_id: "approved"}
+    assert counts == {"616161": 1, "717171": 1}
+
+
+def test_creating_a_gear_closes_its_pending_suggestion(server):
+    async def scenario():
+        async with running(server) as client:
+            headers = await admin_headers(client)
+            suggestion_id = await submit(client, headers, "818181")
+            response = await client.post("/api/gears", headers=headers, json=suggestion("818181"))
+            assert response.status_code == 200, response.text
+            stored = await server.db.suggestions.find_one({"id": suggestion_id})
+            resubmitted = await client.post("/api/suggestions", json=suggestion("818181"))
+            return stored, resubmitted.status_code
+
+    stored, resubmitted = asyncio.run(scenario())
+
+    assert (stored["status"], stored["resolution"]) == ("rejected", "duplicate")
+    assert resubmitted == 409
@@ -0,0 +1,80 @@
+import random
+
+
+def gear(number: int, name: str, description: str = "") -> dict:
+    return {"id": f"{number:06d}", "name": name, "nickname": "", "gear_id": str(number),
+            "description": description}
+
+
+def brute_force(server, gears: list, query: str, limit: int) -> list:
+    """Rank every gear against every query token, the slow way."""
+    tokens = server.tokenize(query)
+    ranked = []
+    for item in gears:
+        weights = {}
+        for field, weight in server.SEARCH_FIELD_WEIGHTS.items():
+            for token in server.tokenize(str(item.get(field, ""))):
+                weights[token] = max(weights.get(token, 0), weight)
+        total = 0
+        for token in tokens:
+            best = 0
+            for word, weight in weights.items():
+                if word == token:
+                    match = server.SEARCH_EXACT
+                elif word.startswith(token):
+                    match = server.SEARCH_PREFIX
+                elif len(token) >= server.SEARCH_FUZZY_MIN_LENGTH and server.within_one_edit(token, word):
+                    match = server.SEARCH_FUZZY
+                else:
+                    continue
+                best = max(best, match * weight)
+            if not best:
+                break
+            total += best
+        else:
+            ranked.append((total, item["id"]))
+    ranked.sort(reverse=True)
+    return [gear_id for _, gear_id in ranked[:limit]]
+
+
+def build(server, gears: list):
+    index = server.GearSearchIndex()
+    index.rebuild(gears)
+    return index
+
+
+def test_rare_conjunction_survives_candidate_cap(server):
+    # Lowest ids, so ties on the driving token would read them last
+    gears = ([gear(n, "Epee Lumiere") for n in range(5)]
+             + [gear(5 + n, f"Epee {n}") for n in range(1500)]
+             + [gear(1505 + n, f"Lumiere {n}") for n in range(1500)])
+    index = build(server, gears)
+
+    results = index.search("epee lumiere", 20)
+
+    assert sorted(results) == sorted(item["id"] for item in gears[:5])
+    assert results == brute_force(server, gears, "epee lumiere", 20)
+
+
+def test_conjunction_respects_accept(server):
+    gears = ([gear(n, "Epee Lumiere") for n in range(10)]
+             + [gear(10 + n, f"Epee {n}") for n in range(1500)])
+    index = build(server, gears)
+    odd = {item["id"] for item in gears if int(item["gear_id"]) % 2}
+
+    results = index.search("epee lumiere", 20, accept=odd.__contains__)
+
+    assert results == [gear_id for gear_id in brute_force(server, gears, "epee lumiere", 20) if gear_id in odd]
+
+
+def test_multi_token_matches_brute_force(server):
+    # Every query here matches fewer gears than the candidate cap, so ranking must be exact
+    words = ["epee", "lumiere", "bouclier", "arc", "baton", "cape", "dague", "lance", "hache", "masse"]
+    rng = random.Random(7)
+    gears = [gear(n, " ".join(rng.sample(words, 3)), " ".join(rng.sample(words, 2))) for n in range(2000)]
+    index = build(server, gears)
+
+    for query in ["epee lumiere", "arc cape dague", "bou lan", "lumeire hache", "masse baton epee", "cap"]:
+        for limit in (5, 20):
+            expected = brute_force(server, gears, query, limit)
+            assert index.search(query, limit) == expected, query